@@ -3,9 +3,16 @@ Flask application factory with Swagger UI
 This creates and configures the Flask app with interactive API documentation
 """
 
+import os
+
 from flask import Flask
 from flask_restx import Api
 
+from app.capture import TrafficCapture
+from app.encoding import ResponseCompressor, register_representations
+from app.tracing import Tracer, trace_representations
+from app.warmup import CacheWarmer
+
 
 def create_app():
     """
@@ -21,6 +28,34 @@ def create_app():
     app.config['DEBUG'] = True
     app.config['TESTING'] = False
 
+    # Opt-in traffic capture for offline replay (see replay.py); registered
+    # first so its latency covers the other request hooks
+    app.config['CAPTURE_PATH'] = os.environ.get('MATH_CAPTURE_PATH')
+    if app.config['CAPTURE_PATH']:
+        TrafficCapture(
+            app.config['CAPTURE_PATH'],
+            max_bytes=int(os.environ.get('MATH_CAPTURE_MAX_BYTES', str(10 * 1024 * 1024))),
+            backup_count=int(os.environ.get('MATH_CAPTURE_BACKUPS', '5'))
+        ).init_app(app)
+
+    # Request tracing: sampled requests get a Server-Timing header,
+    # slow ones are kept for GET /api/v1/debug/slow-requests
+    app.config['TRACE_SAMPLE_RATE'] = float(os.environ.get('MATH_TRACE_SAMPLE_RATE', '0'))
+    app.config['TRACE_SLOW_THRESHOLD_MS'] = float(os.environ.get('MATH_TRACE_SLOW_MS', '500'))
+    app.config['TRACE_BUFFER_SIZE'] = int(os.environ.get('MATH_TRACE_BUFFER_SIZE', '100'))
+
+    tracer = Tracer(
+        sample_rate=app.config['TRACE_SAMPLE_RATE'],
+        slow_threshold_ms=app.config['TRACE_SLOW_THRESHOLD_MS'],
+        buffer_size=app.config['TRACE_BUFFER_SIZE']
+    )
+    tracer.init_app(app)
+
+    # Response compression (gzip/deflate, plus br/zstd when installed);
+    # registered after the tracer so compression shows up in Server-Timing
+    app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('MATH_COMPRESS_MIN_SIZE', '1024'))
+    ResponseCompressor(min_size=app.config['COMPRESS_MIN_SIZE']).init_app(app)
+
     # Create API instance with Swagger documentation
     api = Api(
         app,
@@ -30,8 +65,31 @@ def create_app():
         doc='/',  # Swagger UI will be available at the root URL
     )
 
+    # MessagePack/CBOR bodies for clients that ask for them via Accept
+    register_representations(api)
+    # Time the JSON/MessagePack/CBOR encoders as the 'serialize' span
+    trace_representations(api)
+
     # Register namespaces (equivalent to blueprints in flask-restx)
     from app.views import math_ns
     api.add_namespace(math_ns, path='/api/v1')
 
+    # Warm the result cache from recent history in the background; readiness is not delayed
+    from app.controllers import math_controller
+    from app.database import db_manager
+    from app.operations import registry
+    app.config['WARMUP_ENABLED'] = os.environ.get('MATH_WARMUP', '1') == '1'
+    app.config['WARMUP_TOP_K'] = int(os.environ.get('MATH_WARMUP_TOP_K', '50'))
+    app.config['WARMUP_LOOKBACK_HOURS'] = float(os.environ.get('MATH_WARMUP_LOOKBACK_HOURS', '168'))
+
+    warmer = CacheWarmer(
+        registry,
+        db_manager,
+        # Nothing to warm without the shared result cache
+        enabled=app.config['WARMUP_ENABLED'] and getattr(math_controller, 'cache', None) is not None,
+        top_k=app.config['WARMUP_TOP_K'],
+        lookback_hours=app.config['WARMUP_LOOKBACK_HOURS']
+    )
+    warmer.init_app(app)
+
     return app
\ No newline at end of file
@@ -0,0 +1,357 @@
+"""
+Cross-process result cache backed by a memory-mapped file
+Every worker process maps the same file, so cached results are shared box-wide
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: no byte-range locks, so the cache refuses to start
+    fcntl = None
+
+Number = Union[int, float]
+
+# Header: magic, layout version, number of sets, ways per set, max key bytes, max value bytes
+HEADER_FORMAT = '<4sIIIII'
+HEADER_SIZE = 64
+MAGIC = b'MRC1'
+LAYOUT_VERSION = 2
+
+# Per-set counters (hits, misses, evictions, rejected) follow the header; each
+# set's counters are only written under that set's lock, so no extra locking
+# is needed to keep box-wide totals
+COUNTER_FORMAT = '<QQQQ'
+COUNTER_SIZE = struct.calcsize(COUNTER_FORMAT)
+COUNTER_NAMES = ('hits', 'misses', 'evictions', 'rejected')
+
+# Slot header: key hash (0 = empty), last use (monotonic ns), key length, value length
+SLOT_FORMAT = '<QQHI'
+SLOT_HEADER_SIZE = struct.calcsize(SLOT_FORMAT)
+
+# Value encodings: tagged so ints of any size round-trip exactly
+INT_TAG = b'i'
+FLOAT_TAG = b'f'
+
+
+class SharedResultCache:
+    """
+    Fixed-size, set-associative cache stored in a shared memory-mapped file
+
+    A key hashes to one set and is probed linearly across that set's ways.
+    When the set is full the least recently used way is overwritten, so
+    slots are never emptied and a lookup can stop at the first empty way.
+    Each set is guarded by a byte-range fcntl lock (between processes) and
+    a threading lock (between threads of the same process).
+
+    Hit, miss, eviction and rejection counters live in the file as well,
+    so stats() reports totals for every worker on the box.
+
+    The default file name encodes the layout and geometry, so workers started with
+    different MATH_CACHE_* settings (e.g. during a rolling deploy) map
+    separate files instead of resizing one that is still in use.
+    """
+
+    def __init__(self, path: Optional[str] = None, sets: int = 4096, ways: int = 8,
+                 key_size: int = 64, value_size: int = 256):
+        """
+        Open (or create) the shared cache file
+
+        Args:
+            path: Path of the backing file, shared by all workers
+            sets: Number of sets in the index
+            ways: Slots per set (probe length)
+            key_size: Maximum encoded key length in bytes
+            value_size: Maximum encoded value length in bytes; larger results are not cached
+
+        Raises:
+            RuntimeError: If the platform has no cross-process file locking
+            ValueError: If the file already holds a cache with a different layout
+        """
+        if fcntl is None:
+            raise RuntimeError("Shared result cache needs fcntl file locking (not available on this platform)")
+
+        self.path = path or os.path.join(
+            tempfile.gettempdir(),
+            f'math_result_cache_v{LAYOUT_VERSION}_{sets}x{ways}x{key_size}x{value_size}.bin'
+        )
+        self.sets = sets
+        self.ways = ways
+        self.key_size = key_size
+        self.value_size = value_size
+        self.slot_size = SLOT_HEADER_SIZE + key_size + value_size
+        self.slots_start = HEADER_SIZE + sets * COUNTER_SIZE
+        self.size = self.slots_start + sets * ways * self.slot_size
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._init_file()
+        self._mm = mmap.mmap(self._fd, self.size)
+        self._thread_locks = [threading.Lock() for _ in range(sets)]
+
+        # Locks held by another thread at fork time would never be released in the child
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_thread_locks)
+
+    @classmethod
+    def from_env(cls) -> 'SharedResultCache':
+        """
+        Build a cache configured from MATH_CACHE_* environment variables
+
+        Returns:
+            SharedResultCache: Cache instance
+        """
+        return cls(
+            path=os.environ.get('MATH_CACHE_PATH'),
+            sets=int(os.environ.get('MATH_CACHE_SETS', '4096')),
+            ways=int(os.environ.get('MATH_CACHE_WAYS', '8')),
+            value_size=int(os.environ.get('MATH_CACHE_VALUE_SIZE', '256'))
+        )
+
+    def _init_file(self):
+        """
+        Size the backing file and write the header, unless another process
+        already laid it out with the same geometry
+
+        A file with a different layout is never truncated: other workers may
+        still have it mapped, and shrinking it under them crashes them.
+        """
+        header = struct.pack(HEADER_FORMAT, MAGIC, LAYOUT_VERSION, self.sets,
+                             self.ways, self.key_size, self.value_size)
+
+        self._lock_range(0, 1, exclusive=True)
+        try:
+            file_size = os.fstat(self._fd).st_size
+            if file_size == 0:
+                # Fresh file: lay out an empty cache
+                os.ftruncate(self._fd, self.size)
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.write(self._fd, header)
+                return
+
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            layout_matches = file_size == self.size and os.read(self._fd, len(header)) == header
+        finally:
+            self._unlock_range(0, 1)
+
+        if not layout_matches:
+            os.close(self._fd)
+            raise ValueError(f"Cache file {self.path} has a different layout; "
+                             f"remove it or use another MATH_CACHE_PATH")
+
+    def _reset_thread_locks(self):
+        self._thread_locks = [threading.Lock() for _ in range(self.sets)]
+
+    def _lock_range(self, start: int, length: int, exclusive: bool):
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        fcntl.lockf(self._fd, mode, length, start)
+
+    def _unlock_range(self, start: int, length: int):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, length, start)
+
+    def _lock_set(self, set_index: int):
+        self._thread_locks[set_index].acquire()
+        try:
+            # Byte offsets past the header act as one lock per set
+            self._lock_range(HEADER_SIZE + set_index, 1, exclusive=True)
+        except Exception:
+            self._thread_locks[set_index].release()
+            raise
+
+    def _unlock_set(self, set_index: int):
+        try:
+            self._unlock_range(HEADER_SIZE + set_index, 1)
+        finally:
+            self._thread_locks[set_index].release()
+
+    def _locate(self, key: bytes):
+        """
+        Get the stored tag and set index of a key
+
+        blake2b is stable across processes, unlike hash(), and spreads short,
+        similar keys evenly. The set index comes from the high half of the
+        digest; the tag gets its low bit set so 0 can mean an empty slot.
+        """
+        digest = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+        return digest | 1, (digest >> 32) % self.sets
+
+    def _count(self, set_index: int, counter: str):
+        """
+        Increment one of a set's shared counters; the caller holds the set lock
+        """
+        offset = HEADER_SIZE + set_index * COUNTER_SIZE + COUNTER_NAMES.index(counter) * 8
+        struct.pack_into('<Q', self._mm, offset, struct.unpack_from('<Q', self._mm, offset)[0] + 1)
+
+    def _count_locked(self, set_index: int, counter: str):
+        self._lock_set(set_index)
+        try:
+            self._count(set_index, counter)
+        finally:
+            self._unlock_set(set_index)
+
+    @staticmethod
+    def encode_value(value: Number) -> bytes:
+        """
+        Pack a result into bytes, keeping big integers exact
+        """
+        if isinstance(value, int):
+            length = (value.bit_length() + 8) // 8
+            return INT_TAG + value.to_bytes(length, 'little', signed=True)
+        return FLOAT_TAG + struct.pack('<d', value)
+
+    @staticmethod
+    def decode_value(data: bytes) -> Number:
+        """
+        Unpack a result produced by encode_value
+        """
+        if data[:1] == INT_TAG:
+            return int.from_bytes(data[1:], 'little', signed=True)
+        return struct.unpack('<d', data[1:])[0]
+
+    def _slot_offset(self, set_index: int, way: int) -> int:
+        return self.slots_start + (set_index * self.ways + way) * self.slot_size
+
+    def get(self, key: str) -> Optional[Number]:
+        """
+        Look up a cached result
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached result, or None on a miss
+        """
+        key_bytes = key.encode()
+        key_hash, set_index = self._locate(key_bytes)
+        if len(key_bytes) > self.key_size:
+            self._count_locked(set_index, 'misses')
+            return None
+
+        self._lock_set(set_index)
+        try:
+            for way in range(self.ways):
+                offset = self._slot_offset(set_index, way)
+                slot_hash, _, key_len, value_len = struct.unpack_from(SLOT_FORMAT, self._mm, offset)
+                if slot_hash == 0:
+                    break
+                if slot_hash != key_hash or key_len != len(key_bytes):
+                    continue
+
+                key_start = offset + SLOT_HEADER_SIZE
+                if self._mm[key_start:key_start + key_len] != key_bytes:
+                    continue
+
+                struct.pack_into('<Q', self._mm, offset + 8, time.monotonic_ns())
+                value_start = key_start + self.key_size
+                value = self.decode_value(self._mm[value_start:value_start + value_len])
+                self._count(set_index, 'hits')
+                return value
+
+            self._count(set_index, 'misses')
+            return None
+        finally:
+            self._unlock_set(set_index)
+
+    def set(self, key: str, value: Number) -> bool:
+        """
+        Store a result, evicting the least recently used entry in its set if needed
+
+        Args:
+            key: Cache key
+            value: Result to cache
+
+        Returns:
+            bool: True if stored, False if the key or value exceeds the slot limits
+        """
+        key_bytes = key.encode()
+        value_bytes = self.encode_value(value)
+        key_hash, set_index = self._locate(key_bytes)
+        if len(key_bytes) > self.key_size or len(value_bytes) > self.value_size:
+            self._count_locked(set_index, 'rejected')
+            return False
+
+        self._lock_set(set_index)
+        try:
+            target_way = None
+            oldest_way, oldest_used = 0, None
+            for way in range(self.ways):
+                offset = self._slot_offset(set_index, way)
+                slot_hash, last_used, key_len, _ = struct.unpack_from(SLOT_FORMAT, self._mm, offset)
+                if slot_hash == 0:
+                    target_way = way
+                    break
+                if slot_hash == key_hash and key_len == len(key_bytes):
+                    key_start = offset + SLOT_HEADER_SIZE
+                    if self._mm[key_start:key_start + key_len] == key_bytes:
+                        target_way = way
+                        break
+                if oldest_used is None or last_used < oldest_used:
+                    oldest_way, oldest_used = way, last_used
+
+            if target_way is None:
+                target_way = oldest_way
+                self._count(set_index, 'evictions')
+
+            offset = self._slot_offset(set_index, target_way)
+            key_start = offset + SLOT_HEADER_SIZE
+            value_start = key_start + self.key_size
+            self._mm[key_start:key_start + len(key_bytes)] = key_bytes
+            self._mm[value_start:value_start + len(value_bytes)] = value_bytes
+            struct.pack_into(SLOT_FORMAT, self._mm, offset, key_hash, time.monotonic_ns(),
+                             len(key_bytes), len(value_bytes))
+            return True
+        finally:
+            self._unlock_set(set_index)
+
+    def clear(self):
+        """
+        Drop every cached entry (shared by all workers); counters are kept
+        """
+        for set_index in range(self.sets):
+            self._lock_set(set_index)
+            try:
+                for way in range(self.ways):
+                    struct.pack_into(SLOT_FORMAT, self._mm, self._slot_offset(set_index, way),
+                                     0, 0, 0, 0)
+            finally:
+                self._unlock_set(set_index)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters summed over every process using the cache
+
+        Reads are unlocked, so totals taken under load may lag by a few lookups.
+
+        Returns:
+            Dictionary with hit/miss counters and geometry
+        """
+        totals = dict.fromkeys(COUNTER_NAMES, 0)
+        for set_index in range(self.sets):
+            counters = struct.unpack_from(COUNTER_FORMAT, self._mm, HEADER_SIZE + set_index * COUNTER_SIZE)
+            for name, count in zip(COUNTER_NAMES, counters):
+                totals[name] += count
+
+        lookups = totals['hits'] + totals['misses']
+        return {
+            'path': self.path,
+            'capacity': self.sets * self.ways,
+            'value_size_limit': self.value_size,
+            'hits': totals['hits'],
+            'misses': totals['misses'],
+            'hit_rate': round(totals['hits'] / lookups, 4) if lookups else 0.0,
+            'evictions': totals['evictions'],
+            'rejected': totals['rejected']
+        }
+
+    def close(self):
+        """
+        Unmap the cache; the backing file is left for other workers
+        """
+        self._mm.close()
+        os.close(self._fd)
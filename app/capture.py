@@ -0,0 +1,118 @@
+"""
+Traffic capture - records incoming API requests to rotating JSONL files
+The captures can be replayed offline with replay.py
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+from flask import Flask, g, request
+
+
+class TrafficCapture:
+    """
+    Writes one JSON line per API request: arrival time, operation,
+    payload, status and latency
+
+    Each process writes its own file, <path>.<pid>, because rotating one
+    file from several pre-forked workers loses or mixes records. Files
+    rotate like logging's RotatingFileHandler (requests.jsonl.<pid>,
+    requests.jsonl.<pid>.1, ...), which also makes concurrent writes from
+    the request threads of one process safe. A glob such as
+    requests.jsonl* picks up every worker's files for replay.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 path_prefix: str = '/api/v1/'):
+        """
+        Args:
+            path: Capture file prefix; the directory is created if missing
+            max_bytes: Rotate once a file reaches this size
+            backup_count: Rotated files to keep per process
+            path_prefix: Only requests under this path are captured
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.path_prefix = path_prefix
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._logger: Optional[logging.Logger] = None
+
+    def init_app(self, app: Flask):
+        """
+        Register the capture hooks; call before other after_request hooks
+        so the recorded latency includes them
+        """
+        app.extensions['capture'] = self
+        app.before_request(self._mark_arrival)
+        app.after_request(self._record)
+
+    def process_path(self) -> str:
+        """
+        Capture file written by the current process
+        """
+        return f"{self.path}.{os.getpid()}"
+
+    def _process_logger(self) -> logging.Logger:
+        """
+        Open this process's capture file on first use (again after a fork)
+        """
+        if self._pid == os.getpid():
+            return self._logger
+
+        with self._lock:
+            if self._pid != os.getpid():
+                handler = RotatingFileHandler(self.process_path(), maxBytes=self.max_bytes,
+                                              backupCount=self.backup_count, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger = logging.getLogger(f'math_capture.{self.process_path()}')
+                logger.handlers = [handler]
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                self._logger = logger
+                self._pid = os.getpid()
+        return self._logger
+
+    def _mark_arrival(self):
+        if request.path.startswith(self.path_prefix):
+            g.capture_arrival = (time.time(), time.perf_counter())
+
+    def _record(self, response):
+        arrival = g.pop('capture_arrival', None)
+        if arrival is None:
+            return response
+
+        arrival_ts, arrival_counter = arrival
+        payload: Optional[object] = request.get_json(silent=True) if request.is_json else None
+        self._process_logger().info(json.dumps({
+            'ts': round(arrival_ts, 6),
+            'method': request.method,
+            'path': request.path,
+            'operation': request.path[len(self.path_prefix):],
+            'query': request.args.to_dict() or None,
+            'payload': payload,
+            'status': response.status_code,
+            'latency_ms': round((time.perf_counter() - arrival_counter) * 1000, 3)
+        }))
+        return response
+
+    def close(self):
+        """
+        Close this process's capture file
+        """
+        with self._lock:
+            if self._logger is not None and self._pid == os.getpid():
+                for handler in self._logger.handlers:
+                    handler.close()
+                self._logger.handlers = []
+            self._logger = None
+            self._pid = None
@@ -3,7 +3,7 @@ Controllers - Business logic for mathematical operations
 This file contains the actual mathematical functions
 """
 
-import time
+import os
 from typing import Union
 
 
@@ -95,5 +95,54 @@ class MathController:
         return result
 
 
+class CachedMathController(MathController):
+    """
+    MathController that checks a shared result cache before computing
+
+    Errors are never cached, so invalid inputs still raise on every call.
+    """
+
+    def __init__(self, cache):
+        """
+        Args:
+            cache: Result cache exposing get(key) and set(key, value)
+        """
+        self.cache = cache
+
+    def _cached(self, key: str, compute, *args):
+        result = self.cache.get(key)
+        if result is None:
+            result = compute(*args)
+            self.cache.set(key, result)
+        return result
+
+    def calculate_power(self, base: Union[int, float], exponent: Union[int, float]) -> float:
+        return self._cached(f"power:{base!r}:{exponent!r}", MathController.calculate_power,
+                            base, exponent)
+
+    def calculate_fibonacci(self, n: int) -> int:
+        return self._cached(f"fibonacci:{n}", MathController.calculate_fibonacci, n)
+
+    def calculate_factorial(self, n: int) -> int:
+        return self._cached(f"factorial:{n}", MathController.calculate_factorial, n)
+
+
+def create_math_controller() -> MathController:
+    """
+    Build the math controller, fronted by the shared cache when
+    MATH_SHARED_CACHE=1
+
+    Returns:
+        MathController: Controller instance used by the views
+    """
+    if os.environ.get('MATH_SHARED_CACHE', '0') == '1':
+        from app.cache import SharedResultCache
+        try:
+            return CachedMathController(SharedResultCache.from_env())
+        except (RuntimeError, ValueError, OSError) as e:
+            print(f"❌ Shared result cache disabled: {e}")
+    return MathController()
+
+
 # Create a global instance to use in views
-math_controller = MathController()
\ No newline at end of file
+math_controller = create_math_controller()
\ No newline at end of file
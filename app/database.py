@@ -6,8 +6,117 @@ SQLite database to persist all mathematical calculations
 import sqlite3
 import json
 import os
-from datetime import datetime
-from typing import List, Dict, Any
+import re
+import heapq
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+from app.tracing import span
+
+CREATE_CALCULATIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS calculations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        operation TEXT NOT NULL,
+        input_data TEXT NOT NULL,
+        result REAL NOT NULL,
+        execution_time_ms REAL NOT NULL,
+        timestamp TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+# Input fields pulled out of the input_data JSON so they can be indexed
+GENERATED_INPUT_COLUMNS = {
+    'input_n': '$.n',
+    'input_base': '$.base',
+    'input_exponent': '$.exponent',
+}
+
+# Each index ends in (created_at, timestamp) so filtered history can be read newest first
+CALCULATION_INDEXES = {
+    'idx_calculations_created': '(created_at, timestamp)',
+    'idx_calculations_operation_created': '(operation, created_at, timestamp)',
+    'idx_calculations_input_n': '(input_n, created_at, timestamp)',
+    'idx_calculations_input_base': '(input_base, input_exponent, created_at, timestamp)',
+    'idx_calculations_input_exponent': '(input_exponent, created_at, timestamp)',
+    'idx_calculations_result': '(result, created_at, timestamp)',
+}
+
+# History filter name -> SQL condition
+HISTORY_FILTERS = {
+    'operation': 'operation = ?',
+    'since': 'created_at >= ?',
+    'until': 'created_at <= ?',
+    'n': 'input_n = ?',
+    'base': 'input_base = ?',
+    'exponent': 'input_exponent = ?',
+    'min_result': 'result >= ?',
+    'max_result': 'result <= ?',
+}
+
+
+def apply_schema(conn: sqlite3.Connection):
+    """
+    Create the calculations table, its generated input columns and indexes
+
+    Safe to run on every start: existing databases are migrated in place.
+
+    Args:
+        conn: Open connection to the database file
+    """
+    conn.execute(CREATE_CALCULATIONS_TABLE)
+
+    existing_columns = {row[1] for row in conn.execute('PRAGMA table_xinfo(calculations)')}
+    for column, json_path in GENERATED_INPUT_COLUMNS.items():
+        if column not in existing_columns:
+            conn.execute(f'''
+                ALTER TABLE calculations ADD COLUMN {column}
+                GENERATED ALWAYS AS (json_extract(input_data, '{json_path}')) VIRTUAL
+            ''')
+
+    for index_name, columns in CALCULATION_INDEXES.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON calculations {columns}')
+
+    conn.commit()
+
+
+def build_history_query(limit: int, filters: Dict[str, Any]) -> tuple:
+    """
+    Build the SQL for a filtered history query
+
+    Args:
+        limit: Maximum number of records to retrieve
+        filters: Filter name -> value, see HISTORY_FILTERS; None values are ignored
+
+    Returns:
+        tuple: (sql, params)
+
+    Raises:
+        ValueError: If an unknown filter is given
+    """
+    conditions = []
+    params = []
+    for name, value in filters.items():
+        if name not in HISTORY_FILTERS:
+            raise ValueError(f"Unknown history filter: {name}")
+        if value is None:
+            continue
+        conditions.append(HISTORY_FILTERS[name])
+        params.append(value)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    sql = f'''
+        SELECT id, operation, input_data, result, execution_time_ms, timestamp, created_at
+        FROM calculations 
+        {where}
+        ORDER BY created_at DESC, timestamp DESC, id DESC 
+        LIMIT ?
+    '''
+    params.append(limit)
+    return sql, params
 
 
 class DatabaseManager:
@@ -31,22 +140,10 @@ class DatabaseManager:
         """
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
 
-            # Create calculations table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS calculations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    operation TEXT NOT NULL,
-                    input_data TEXT NOT NULL,
-                    result REAL NOT NULL,
-                    execution_time_ms REAL NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            # Create calculations table, generated input columns and indexes
+            apply_schema(conn)
 
-            conn.commit()
             conn.close()
 
             print(f"✅ Database initialized: {self.db_path}")
@@ -69,19 +166,22 @@ class DatabaseManager:
             bool: True if saved successfully, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with span('db.connect'):
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
 
             timestamp = datetime.now().isoformat()
             input_json = json.dumps(input_data)
 
-            cursor.execute('''
-                INSERT INTO calculations 
-                (operation, input_data, result, execution_time_ms, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (operation, input_json, result, execution_time_ms, timestamp))
+            with span('db.insert'):
+                cursor.execute('''
+                    INSERT INTO calculations 
+                    (operation, input_data, result, execution_time_ms, timestamp)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (operation, input_json, result, execution_time_ms, timestamp))
 
-            conn.commit()
+            with span('db.commit'):
+                conn.commit()
             conn.close()
 
             print(f"💾 Saved {operation} calculation: {input_data} = {result}")
@@ -91,49 +191,64 @@ class DatabaseManager:
             print(f"❌ Error saving calculation: {e}")
             return False
 
-    def get_calculation_history(self, limit: int = 100) -> List[Dict[str, Any]]:
+    def get_calculation_history(self, limit: int = 100, **filters) -> List[Dict[str, Any]]:
         """
         Retrieve calculation history from database
 
         Args:
             limit: Maximum number of records to retrieve
+            **filters: Optional filters (operation, since, until, n, base,
+                exponent, min_result, max_result); see HISTORY_FILTERS
 
         Returns:
             List of calculation records
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                SELECT id, operation, input_data, result, execution_time_ms, timestamp, created_at
-                FROM calculations 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            ''', (limit,))
-
-            records = cursor.fetchall()
-            conn.close()
-
-            # Convert to list of dictionaries
-            history = []
-            for record in records:
-                history.append({
-                    'id': record[0],
-                    'operation': record[1],
-                    'input_data': json.loads(record[2]),
-                    'result': record[3],
-                    'execution_time_ms': record[4],
-                    'timestamp': record[5],
-                    'created_at': record[6]
-                })
-
-            return history
+            return self._query_history(self.db_path, limit, filters)
 
         except Exception as e:
             print(f"❌ Error retrieving history: {e}")
             return []
 
+    @staticmethod
+    def _query_history(db_path: str, limit: int,
+                       filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Read the latest matching calculations from a single database file
+
+        Args:
+            db_path: Path to SQLite database file
+            limit: Maximum number of records to retrieve
+            filters: Optional history filters
+
+        Returns:
+            List of calculation records, newest first
+        """
+        sql, params = build_history_query(limit, filters or {})
+
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(sql, params)
+
+        records = cursor.fetchall()
+        conn.close()
+
+        # Convert to list of dictionaries
+        history = []
+        for record in records:
+            history.append({
+                'id': record[0],
+                'operation': record[1],
+                'input_data': json.loads(record[2]),
+                'result': record[3],
+                'execution_time_ms': record[4],
+                'timestamp': record[5],
+                'created_at': record[6]
+            })
+
+        return history
+
     def get_operation_stats(self) -> Dict[str, Any]:
         """
         Get statistics about API usage
@@ -177,6 +292,48 @@ class DatabaseManager:
             print(f"❌ Error getting stats: {e}")
             return {}
 
+    def get_frequent_inputs(self, operation: str, limit: int = 50,
+                            since: Optional[str] = None) -> List[tuple]:
+        """
+        Get the most requested inputs for an operation
+
+        Args:
+            operation: Operation name
+            limit: Maximum number of distinct inputs
+            since: Only count calculations created at or after this UTC time
+
+        Returns:
+            List of (input_data, request count), most requested first
+        """
+        try:
+            counts = self._query_input_counts(self.db_path, operation, limit, since)
+            return [(json.loads(input_json), count) for input_json, count in counts]
+
+        except Exception as e:
+            print(f"❌ Error getting frequent inputs: {e}")
+            return []
+
+    @staticmethod
+    def _query_input_counts(db_path: str, operation: str, limit: Optional[int],
+                            since: Optional[str]) -> List[tuple]:
+        """
+        Count requests per distinct input_data in one database file
+        """
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        # Served by idx_calculations_operation_created
+        cursor.execute('''
+            SELECT input_data, COUNT(*) AS requests
+            FROM calculations 
+            WHERE operation = ? AND created_at >= ?
+            GROUP BY input_data
+            ORDER BY requests DESC
+            LIMIT ?
+        ''', (operation, since or '', -1 if limit is None else limit))
+        counts = cursor.fetchall()
+        conn.close()
+        return counts
+
     def clear_history(self) -> bool:
         """
         Clear all calculation history (useful for testing)
@@ -200,5 +357,385 @@ class DatabaseManager:
             return False
 
 
+class ShardedDatabaseManager(DatabaseManager):
+    """
+    Stores calculations in one SQLite file per time window (and optionally
+    per operation) so writers only ever lock the current shard.
+
+    Reads fan out across every shard on a thread pool and the partial
+    results are merged. Old shards can be archived by moving whole files.
+    """
+
+    # strftime formats for the supported shard windows; keys sort chronologically
+    WINDOW_FORMATS = {
+        'hour': '%Y%m%d%H',
+        'day': '%Y%m%d',
+        'month': '%Y%m',
+    }
+    SHARD_FILE_PATTERN = re.compile(r'^calc_(\d+)(?:_([A-Za-z0-9_-]+))?\.db$')
+
+    def __init__(self, shard_dir: str = "math_shards", window: str = "month",
+                 by_operation: bool = False, max_workers: int = 4):
+        """
+        Initialize sharded database manager
+
+        Args:
+            shard_dir: Directory holding the shard files
+            window: Time window per shard ('hour', 'day' or 'month')
+            by_operation: Also split each window by operation
+            max_workers: Thread pool size used for fan-out queries
+        """
+        if window not in self.WINDOW_FORMATS:
+            raise ValueError(f"Unknown shard window: {window}")
+
+        self.shard_dir = shard_dir
+        self.window = window
+        self.by_operation = by_operation
+        self.max_workers = max_workers
+        self._initialized_shards = set()
+        self._init_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='shard-query')
+        super().__init__(db_path=shard_dir)
+
+    def shard_path_for(self, operation: Optional[str] = None,
+                       when: Optional[datetime] = None) -> str:
+        """
+        Get the shard file a calculation belongs to
+
+        Args:
+            operation: Operation name, used when sharding by operation
+            when: Time of the calculation (defaults to now, UTC)
+
+        Returns:
+            str: Path to the shard file
+        """
+        when = when or datetime.now(timezone.utc)
+        name = f"calc_{when.strftime(self.WINDOW_FORMATS[self.window])}"
+        if self.by_operation and operation:
+            name += f"_{self._shard_suffix(operation)}"
+        return os.path.join(self.shard_dir, f"{name}.db")
+
+    @staticmethod
+    def _shard_suffix(operation: str) -> str:
+        """
+        File-name suffix for an operation; characters SHARD_FILE_PATTERN does not accept become '-'
+        """
+        return re.sub(r'[^A-Za-z0-9_-]', '-', operation)
+
+    def list_shards(self) -> List[str]:
+        """
+        List the shard files currently attached, newest window first
+
+        Returns:
+            List of shard file paths
+        """
+        if not os.path.isdir(self.shard_dir):
+            return []
+
+        shards = []
+        for name in os.listdir(self.shard_dir):
+            match = self.SHARD_FILE_PATTERN.match(name)
+            if match:
+                shards.append((match.group(1), name))
+
+        shards.sort(reverse=True)
+        return [os.path.join(self.shard_dir, name) for _, name in shards]
+
+    def init_database(self):
+        """
+        Create the shard directory; shard files are created on first write
+        """
+        try:
+            os.makedirs(self.shard_dir, exist_ok=True)
+            print(f"✅ Sharded database initialized: {self.shard_dir} (window={self.window})")
+
+        except Exception as e:
+            print(f"❌ Database initialization error: {e}")
+
+    def _ensure_shard(self, shard_path: str):
+        """
+        Create the calculations table in a shard the first time it is used
+        """
+        if shard_path in self._initialized_shards:
+            return
+
+        with self._init_lock:
+            if shard_path in self._initialized_shards:
+                return
+            conn = sqlite3.connect(shard_path)
+            apply_schema(conn)
+            conn.close()
+            self._initialized_shards.add(shard_path)
+
+    def save_calculation(self, operation: str, input_data: Dict[str, Any],
+                         result: float, execution_time_ms: float) -> bool:
+        """
+        Save a calculation request to the current shard
+
+        Args:
+            operation: Type of mathematical operation (power, fibonacci, factorial)
+            input_data: Dictionary with input parameters
+            result: Calculation result
+            execution_time_ms: Time taken for calculation in milliseconds
+
+        Returns:
+            bool: True if saved successfully, False otherwise
+        """
+        try:
+            shard_path = self.shard_path_for(operation)
+            self._ensure_shard(shard_path)
+
+            with span('db.connect'):
+                conn = sqlite3.connect(shard_path)
+            with span('db.insert'):
+                conn.execute('''
+                    INSERT INTO calculations 
+                    (operation, input_data, result, execution_time_ms, timestamp)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (operation, json.dumps(input_data), result, execution_time_ms,
+                      datetime.now().isoformat()))
+            with span('db.commit'):
+                conn.commit()
+            conn.close()
+
+            print(f"💾 Saved {operation} calculation: {input_data} = {result}")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error saving calculation: {e}")
+            return False
+
+    def get_calculation_history(self, limit: int = 100, **filters) -> List[Dict[str, Any]]:
+        """
+        Retrieve the latest calculations across all shards
+
+        Shards outside the requested time range or operation are skipped.
+        Each remaining shard returns its own top-N, then the sorted partial
+        lists are merged by created_at.
+
+        Args:
+            limit: Maximum number of records to retrieve
+            **filters: Optional history filters; see HISTORY_FILTERS
+
+        Returns:
+            List of calculation records, newest first
+        """
+        try:
+            shards = self._shards_matching(filters)
+            partials = list(self._executor.map(
+                lambda path: self._query_shard_history(path, limit, filters), shards))
+
+            # created_at only has one-second resolution; timestamp breaks the ties
+            merged = heapq.merge(*partials, key=lambda r: (r['created_at'], r['timestamp']),
+                                 reverse=True)
+            return [record for _, record in zip(range(limit), merged)]
+
+        except Exception as e:
+            print(f"❌ Error retrieving history: {e}")
+            return []
+
+    def _shards_matching(self, filters: Dict[str, Any]) -> List[str]:
+        """
+        List the shards that can hold rows matching the time range and operation
+        """
+        key_length = len(datetime(2000, 1, 1).strftime(self.WINDOW_FORMATS[self.window]))
+        since, until = filters.get('since'), filters.get('until')
+        since_key = re.sub(r'\D', '', since)[:key_length] if since else None
+        until_key = re.sub(r'\D', '', until)[:key_length] if until else None
+        operation = filters.get('operation')
+        if operation:
+            operation = self._shard_suffix(operation)
+
+        shards = []
+        for shard_path in self.list_shards():
+            match = self.SHARD_FILE_PATTERN.match(os.path.basename(shard_path))
+            window_key, shard_operation = match.group(1), match.group(2)
+            if since_key and window_key < since_key:
+                continue
+            if until_key and window_key > until_key:
+                continue
+            if operation and shard_operation and shard_operation != operation:
+                continue
+            shards.append(shard_path)
+        return shards
+
+    def _query_shard_history(self, shard_path: str, limit: int,
+                             filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Read one shard's history, tagging each record with its shard file
+        """
+        # Shards written by older versions get the generated columns and indexes here
+        self._ensure_shard(shard_path)
+        history = self._query_history(shard_path, limit, filters)
+        shard_name = os.path.basename(shard_path)
+        for record in history:
+            record['shard'] = shard_name
+        return history
+
+    @staticmethod
+    def _query_shard_totals(shard_path: str) -> Dict[str, tuple]:
+        """
+        Get per-operation (count, total execution time) for one shard
+        """
+        conn = sqlite3.connect(shard_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT operation, COUNT(*), SUM(execution_time_ms)
+            FROM calculations 
+            GROUP BY operation
+        ''')
+        totals = {row[0]: (row[1], row[2] or 0.0) for row in cursor.fetchall()}
+        conn.close()
+        return totals
+
+    def get_operation_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics about API usage, summed across all shards
+
+        Returns:
+            Dictionary with usage statistics
+        """
+        try:
+            shards = self.list_shards()
+            partials = self._executor.map(self._query_shard_totals, shards)
+
+            counts: Dict[str, int] = {}
+            time_sums: Dict[str, float] = {}
+            for totals in partials:
+                for operation, (count, time_sum) in totals.items():
+                    counts[operation] = counts.get(operation, 0) + count
+                    time_sums[operation] = time_sums.get(operation, 0.0) + time_sum
+
+            return {
+                'total_calculations': sum(counts.values()),
+                'operations_count': counts,
+                'average_execution_times': {
+                    operation: time_sums[operation] / counts[operation]
+                    for operation in counts
+                },
+                'shard_count': len(shards)
+            }
+
+        except Exception as e:
+            print(f"❌ Error getting stats: {e}")
+            return {}
+
+    def get_frequent_inputs(self, operation: str, limit: int = 50,
+                            since: Optional[str] = None) -> List[tuple]:
+        """
+        Get the most requested inputs for an operation across all shards
+
+        Per-shard counts are summed before taking the top entries, so an
+        input spread over several shards is ranked by its total.
+
+        Args:
+            operation: Operation name
+            limit: Maximum number of distinct inputs
+            since: Only count calculations created at or after this UTC time
+
+        Returns:
+            List of (input_data, request count), most requested first
+        """
+        try:
+            shards = self._shards_matching({'operation': operation, 'since': since})
+            partials = self._executor.map(
+                lambda path: self._query_input_counts(path, operation, None, since), shards)
+
+            totals: Dict[str, int] = {}
+            for counts in partials:
+                for input_json, count in counts:
+                    totals[input_json] = totals.get(input_json, 0) + count
+
+            top = heapq.nlargest(limit, totals.items(), key=lambda item: item[1])
+            return [(json.loads(input_json), count) for input_json, count in top]
+
+        except Exception as e:
+            print(f"❌ Error getting frequent inputs: {e}")
+            return []
+
+    def clear_history(self) -> bool:
+        """
+        Clear all calculation history in every shard
+
+        Returns:
+            bool: True if cleared successfully
+        """
+        try:
+            for shard_path in self.list_shards():
+                conn = sqlite3.connect(shard_path)
+                conn.execute('DELETE FROM calculations')
+                conn.commit()
+                conn.close()
+
+            print("🗑️  Calculation history cleared")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error clearing history: {e}")
+            return False
+
+    def archive_shards(self, before: str, archive_dir: Optional[str] = None) -> List[str]:
+        """
+        Detach shards whose window is older than `before` by moving the files
+
+        Archived shards no longer take part in history or stats queries.
+
+        Args:
+            before: Window key to compare against (e.g. '202401' for month shards)
+            archive_dir: Where to move the files (defaults to <shard_dir>/archive)
+
+        Returns:
+            List of archived file paths
+        """
+        archive_dir = archive_dir or os.path.join(self.shard_dir, 'archive')
+        current_key = datetime.now(timezone.utc).strftime(self.WINDOW_FORMATS[self.window])
+        archived = []
+
+        try:
+            os.makedirs(archive_dir, exist_ok=True)
+            for shard_path in self.list_shards():
+                name = os.path.basename(shard_path)
+                window_key = self.SHARD_FILE_PATTERN.match(name).group(1)
+                # Never detach the shard writers are currently using
+                if window_key >= before or window_key == current_key:
+                    continue
+
+                target = os.path.join(archive_dir, name)
+                shutil.move(shard_path, target)
+                self._initialized_shards.discard(shard_path)
+                archived.append(target)
+
+            if archived:
+                print(f"📦 Archived {len(archived)} shard(s) to {archive_dir}")
+            return archived
+
+        except Exception as e:
+            print(f"❌ Error archiving shards: {e}")
+            return archived
+
+
+def create_database_manager() -> DatabaseManager:
+    """
+    Build the database manager selected by environment variables
+
+    Setting MATH_DB_SHARD_DIR switches to the sharded layout; MATH_DB_SHARD_WINDOW
+    and MATH_DB_SHARD_BY_OPERATION tune it. Otherwise a single file at
+    MATH_DB_PATH (default math_calculations.db) is used.
+
+    Returns:
+        DatabaseManager: Configured database manager
+    """
+    shard_dir = os.environ.get('MATH_DB_SHARD_DIR')
+    if shard_dir:
+        return ShardedDatabaseManager(
+            shard_dir=shard_dir,
+            window=os.environ.get('MATH_DB_SHARD_WINDOW', 'month'),
+            by_operation=os.environ.get('MATH_DB_SHARD_BY_OPERATION', '0') == '1',
+            max_workers=int(os.environ.get('MATH_DB_SHARD_WORKERS', '4'))
+        )
+    return DatabaseManager(os.environ.get('MATH_DB_PATH', 'math_calculations.db'))
+
+
 # Create global database manager instance
-db_manager = DatabaseManager()
\ No newline at end of file
+db_manager = create_database_manager()
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""
+Response encoding - binary representations and compression
+Negotiates MessagePack/CBOR bodies via Accept and gzip/deflate/br/zstd via Accept-Encoding
+"""
+
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from flask import Flask, make_response, request
+from flask_restx import Api
+
+from app.tracing import span
+
+# Optional codecs: each is only offered when its package is installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+CBOR_MIMETYPE = 'application/cbor'
+
+# MessagePack ints stop at 64 bits; larger ones are sent as this extension
+# type holding the two's complement big-endian bytes
+MSGPACK_BIGINT_EXT = 1
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, int):
+        length = (obj.bit_length() + 8) // 8
+        return msgpack.ExtType(MSGPACK_BIGINT_EXT, obj.to_bytes(length, 'big', signed=True))
+    raise TypeError(f"Cannot serialize {type(obj).__name__} to MessagePack")
+
+
+def msgpack_ext_hook(code: int, data: bytes):
+    """
+    ext_hook for msgpack.unpackb that restores big integers
+    """
+    if code == MSGPACK_BIGINT_EXT:
+        return int.from_bytes(data, 'big', signed=True)
+    return msgpack.ExtType(code, data)
+
+
+def output_msgpack(data, code, headers=None):
+    """
+    Flask-RESTX representation: MessagePack body, big ints as raw bytes
+    """
+    response = make_response(msgpack.packb(data, default=_msgpack_default, use_bin_type=True), code)
+    response.headers.extend(headers or {})
+    response.mimetype = MSGPACK_MIMETYPE
+    return response
+
+
+def output_cbor(data, code, headers=None):
+    """
+    Flask-RESTX representation: CBOR body, big ints as bignum byte strings
+    """
+    response = make_response(cbor2.dumps(data), code)
+    response.headers.extend(headers or {})
+    response.mimetype = CBOR_MIMETYPE
+    return response
+
+
+def register_representations(api: Api) -> List[str]:
+    """
+    Offer the binary encodings whose packages are installed
+
+    Args:
+        api: Flask-RESTX Api; JSON stays the default for Accept: */*
+
+    Returns:
+        List of registered mimetypes
+    """
+    registered = []
+    if msgpack is not None:
+        api.representation(MSGPACK_MIMETYPE)(output_msgpack)
+        registered.append(MSGPACK_MIMETYPE)
+    if cbor2 is not None:
+        api.representation(CBOR_MIMETYPE)(output_cbor)
+        registered.append(CBOR_MIMETYPE)
+    return registered
+
+
+def _zlib_compressor(wbits: int, level: int) -> Callable[[], object]:
+    return lambda: zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+
+class _BrotliCompressor:
+    """
+    Gives brotli's streaming Compressor the compress/flush interface of zlib
+    """
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=5)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    """
+    Gives zstandard's streaming compressobj the interface of zlib
+    """
+
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class ResponseCompressor:
+    """
+    Compresses responses according to Accept-Encoding
+
+    Bodies below the size threshold are sent as-is. Streamed responses are
+    compressed chunk by chunk instead of being buffered first. Partial
+    content is never compressed: its Content-Range counts uncompressed bytes.
+    """
+
+    def __init__(self, min_size: int = 1024, level: int = 6):
+        """
+        Args:
+            min_size: Smallest body (bytes) worth compressing
+            level: gzip/deflate compression level
+        """
+        self.min_size = min_size
+
+        # Server preference order, used when the client gives equal q-values
+        self.encoders: Dict[str, Callable[[], object]] = {}
+        if zstandard is not None:
+            self.encoders['zstd'] = _ZstdCompressor
+        if brotli is not None:
+            self.encoders['br'] = _BrotliCompressor
+        self.encoders['gzip'] = _zlib_compressor(16 + zlib.MAX_WBITS, level)
+        self.encoders['deflate'] = _zlib_compressor(zlib.MAX_WBITS, level)
+
+    def init_app(self, app: Flask):
+        """
+        Register the compression hook on a Flask app
+        """
+        app.extensions['compressor'] = self
+        app.after_request(self._compress_response)
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        """
+        Pick the best supported encoding for an Accept-Encoding header
+
+        Args:
+            accept_encoding: Raw header value, e.g. "gzip;q=0.8, br"
+
+        Returns:
+            Encoding name, or None to send the body uncompressed
+        """
+        accepted = {}
+        for part in accept_encoding.split(','):
+            name, _, params = part.strip().partition(';')
+            quality = 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name.strip().lower()] = quality
+
+        wildcard = accepted.get('*', 0.0)
+        best, best_quality = None, 0.0
+        for name in self.encoders:
+            quality = accepted.get(name, wildcard)
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def _compress_response(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers or 'Content-Range' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._stream(response.response, self.encoders[encoding]())
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            with span('compress'):
+                compressor = self.encoders[encoding]()
+                response.set_data(compressor.compress(body) + compressor.flush())
+
+        response.headers['Content-Encoding'] = encoding
+        # The compressed bytes differ from the identity variant, so a strong ETag no longer holds
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    @staticmethod
+    def _stream(chunks: Iterable[bytes], compressor) -> Iterator[bytes]:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
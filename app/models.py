@@ -4,8 +4,8 @@ These models define what data we expect from API requests and responses
 """
 
 from pydantic import BaseModel, Field, validator
-from typing import Union
-from datetime import datetime
+from typing import Optional, Union
+from datetime import datetime, timezone
 
 
 class PowerRequest(BaseModel):
@@ -40,6 +40,34 @@ class FactorialRequest(BaseModel):
     n: int = Field(..., ge=0, le=100, description="Number for factorial calculation (0-100)")
 
 
+class HistoryQuery(BaseModel):
+    """
+    Model for calculation history query parameters
+    All filters are optional and combined with AND; times without a timezone are UTC
+    """
+    limit: int = Field(50, ge=1, le=1000, description="Maximum number of records (1-1000)")
+    operation: Optional[str] = Field(None, description="Only this operation")
+    since: Optional[datetime] = Field(None, description="Created at or after this time")
+    until: Optional[datetime] = Field(None, description="Created at or before this time")
+    n: Optional[int] = Field(None, description="Input n (fibonacci, factorial)")
+    base: Optional[float] = Field(None, description="Input base (power)")
+    exponent: Optional[float] = Field(None, description="Input exponent (power)")
+    min_result: Optional[float] = Field(None, description="Result greater than or equal to")
+    max_result: Optional[float] = Field(None, description="Result less than or equal to")
+
+    def to_filters(self) -> dict:
+        """Database filters for the parameters that were given"""
+        filters = self.model_dump(exclude={'limit'}, exclude_none=True)
+        for key in ('since', 'until'):
+            if key in filters:
+                value = filters[key]
+                if value.tzinfo is not None:
+                    value = value.astimezone(timezone.utc)
+                # Same format as SQLite's CURRENT_TIMESTAMP in created_at
+                filters[key] = value.strftime('%Y-%m-%d %H:%M:%S')
+        return filters
+
+
 class MathResponse(BaseModel):
     """
     Standard response model for all mathematical operations
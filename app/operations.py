@@ -0,0 +1,108 @@
+"""
+Operation registry - every mathematical operation declared once
+Routes, Swagger models and the request pipeline in views.py are generated from these declarations
+"""
+
+from typing import Any, Callable, Dict, Iterator, Optional, Type
+
+from pydantic import BaseModel
+
+from app.controllers import math_controller
+from app.models import PowerRequest, FibonacciRequest, FactorialRequest
+
+
+class Operation:
+    """
+    Declaration of a single mathematical operation
+    """
+
+    def __init__(self, name: str, request_model: Type[BaseModel], compute: Callable[..., Any],
+                 summary: str, description: str, example: Dict[str, Any],
+                 cost: Optional[Callable[..., float]] = None,
+                 serialize: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            name: Operation name, also its URL path (/api/v1/<name>)
+            request_model: Pydantic model validating the JSON body
+            compute: Called with the validated fields as keyword arguments
+            summary: One-line Swagger summary
+            description: Longer Swagger description
+            example: Example request body shown in Swagger
+            cost: Estimated relative work for the given inputs (defaults to 1)
+            serialize: Converts the result for the response (defaults to unchanged)
+        """
+        self.name = name
+        self.request_model = request_model
+        self.compute = compute
+        self.summary = summary
+        self.description = description
+        self.example = example
+        self.cost = cost or (lambda **params: 1.0)
+        self.serialize = serialize
+
+
+class OperationRegistry:
+    """
+    Ordered collection of the operations the API exposes
+    """
+
+    def __init__(self):
+        self._operations: Dict[str, Operation] = {}
+
+    def register(self, operation: Operation) -> Operation:
+        """
+        Add an operation
+
+        Raises:
+            ValueError: If an operation with the same name is already registered
+        """
+        if operation.name in self._operations:
+            raise ValueError(f"Operation already registered: {operation.name}")
+        self._operations[operation.name] = operation
+        return operation
+
+    def get(self, name: str) -> Optional[Operation]:
+        return self._operations.get(name)
+
+    def names(self):
+        return list(self._operations)
+
+    def __iter__(self) -> Iterator[Operation]:
+        return iter(self._operations.values())
+
+    def __len__(self) -> int:
+        return len(self._operations)
+
+
+# Global registry used by the views
+registry = OperationRegistry()
+
+registry.register(Operation(
+    name='power',
+    request_model=PowerRequest,
+    compute=math_controller.calculate_power,
+    summary='Calculate base raised to the power of exponent (base^exponent)',
+    description='Returns the result of base^exponent calculation.',
+    example={'base': 2.0, 'exponent': 3.0},
+    cost=lambda base, exponent: 1.0
+))
+
+registry.register(Operation(
+    name='fibonacci',
+    request_model=FibonacciRequest,
+    compute=math_controller.calculate_fibonacci,
+    summary='Calculate the nth Fibonacci number',
+    description='Returns the nth number in the Fibonacci sequence (0, 1, 1, 2, 3, 5, 8, 13, ...).',
+    example={'n': 10},
+    cost=lambda n: float(max(n, 1))
+))
+
+registry.register(Operation(
+    name='factorial',
+    request_model=FactorialRequest,
+    compute=math_controller.calculate_factorial,
+    summary='Calculate the factorial of n (n!)',
+    description='Returns n! = n × (n-1) × (n-2) × ... × 1',
+    example={'n': 5},
+    cost=lambda n: float(max(n, 1))
+))
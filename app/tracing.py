@@ -0,0 +1,223 @@
+"""
+Lightweight per-request tracing
+Records nested timing spans, returns them as a Server-Timing header and keeps slow requests for debugging
+"""
+
+import functools
+import random
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, g, request
+
+# Trace of the request being handled, or None when it was not sampled
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('current_trace', default=None)
+
+
+class Span:
+    """
+    One timed stage of a request; spans nest to form a tree
+    """
+    __slots__ = ('name', 'start', 'end', 'children')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.children: List['Span'] = []
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'duration_ms': round(self.duration_ms, 3),
+            'children': [child.to_dict() for child in self.children]
+        }
+
+
+class Trace:
+    """
+    Span tree for a single request
+    """
+
+    def __init__(self, request_id: str, name: str):
+        self.request_id = request_id
+        self.root = Span(name)
+        self._stack = [self.root]
+
+    def start_span(self, name: str) -> Span:
+        span = Span(name)
+        self._stack[-1].children.append(span)
+        self._stack.append(span)
+        return span
+
+    def end_span(self, span: Span):
+        span.end = time.perf_counter()
+        if self._stack[-1] is span:
+            self._stack.pop()
+
+    def finish(self):
+        self.root.end = time.perf_counter()
+
+    def server_timing(self) -> str:
+        """
+        Format the spans as a Server-Timing header value
+
+        Spans with the same name (e.g. repeated db calls) are summed.
+        """
+        totals: Dict[str, float] = {}
+        pending = list(self.root.children)
+        while pending:
+            span = pending.pop()
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+            pending.extend(span.children)
+
+        metrics = [f"{name};dur={duration:.3f}" for name, duration in totals.items()]
+        metrics.append(f"total;dur={self.root.duration_ms:.3f}")
+        return ', '.join(metrics)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'request_id': self.request_id,
+            'total_ms': round(self.root.duration_ms, 3),
+            'spans': self.root.to_dict()
+        }
+
+
+class _NullSpan:
+    """
+    No-op span returned when the current request is not traced
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _ActiveSpan:
+    __slots__ = ('trace', 'name', 'span')
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.span = self.trace.start_span(self.name)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.trace.end_span(self.span)
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """
+    Time a block of code as a span of the current request
+
+    Usage:
+        with span('compute'):
+            ...
+
+    Costs one context variable lookup when the request is not sampled.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _ActiveSpan(trace, name)
+
+
+def trace_representations(api):
+    """
+    Time every response encoder of a Flask-RESTX Api as a 'serialize' span
+
+    The encoders (JSON, MessagePack, CBOR) run after the resource method
+    returns, so they are wrapped here rather than timed in the views.
+    Call after all representations are registered.
+
+    Args:
+        api: Flask-RESTX Api
+    """
+    def traced(output):
+        @functools.wraps(output)
+        def output_with_span(data, code, headers=None):
+            with span('serialize'):
+                return output(data, code, headers)
+        return output_with_span
+
+    for mediatype, output in list(api.representations.items()):
+        api.representations[mediatype] = traced(output)
+
+
+class Tracer:
+    """
+    Samples requests, attaches Server-Timing headers and keeps a ring
+    buffer of the slowest ones
+    """
+
+    def __init__(self, sample_rate: float = 0.0, slow_threshold_ms: float = 500.0,
+                 buffer_size: int = 100):
+        """
+        Args:
+            sample_rate: Fraction of requests to trace (0 disables tracing)
+            slow_threshold_ms: Traced requests slower than this are kept in the ring buffer
+            buffer_size: How many slow requests to keep
+        """
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_requests = deque(maxlen=buffer_size)
+
+    def init_app(self, app: Flask):
+        """
+        Register the request hooks on a Flask app
+        """
+        app.extensions['tracer'] = self
+        app.before_request(self._start_trace)
+        app.after_request(self._finish_trace)
+        app.teardown_request(self._clear_trace)
+
+    def _start_trace(self):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        trace = Trace(request_id, f"{request.method} {request.path}")
+        g.trace_token = _current_trace.set(trace)
+
+    def _finish_trace(self, response):
+        trace = _current_trace.get()
+        if trace is None:
+            return response
+
+        trace.finish()
+        response.headers['X-Request-ID'] = trace.request_id
+        response.headers['Server-Timing'] = trace.server_timing()
+
+        if trace.root.duration_ms >= self.slow_threshold_ms:
+            captured = trace.to_dict()
+            captured['status_code'] = response.status_code
+            self.slow_requests.append(captured)
+
+        return response
+
+    def _clear_trace(self, exc=None):
+        token = g.pop('trace_token', None)
+        if token is not None:
+            _current_trace.reset(token)
+
+    def get_slow_requests(self) -> List[Dict[str, Any]]:
+        """
+        Get captured slow requests, newest first
+        """
+        return list(reversed(self.slow_requests))
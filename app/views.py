@@ -3,35 +3,22 @@ Views - API endpoints with Swagger documentation
 This file defines the URLs and how to handle requests with interactive documentation
 """
 
-from flask import request
+from flask import current_app, request
 from flask_restx import Namespace, Resource, fields
 from pydantic import ValidationError
+from datetime import datetime
 import time
 
-from app.models import (
-    PowerRequest, FibonacciRequest, FactorialRequest,
-    MathResponse, ErrorResponse
-)
+from app.models import HistoryQuery, ErrorResponse
 from app.controllers import math_controller
 from app.database import db_manager
+from app.operations import Operation, registry
+from app.tracing import span
 
 # Create a Namespace (like Blueprint but for flask-restx)
 math_ns = Namespace('math', description='Mathematical operations')
 
 # Define Swagger models for documentation
-power_input_model = math_ns.model('PowerInput', {
-    'base': fields.Float(required=True, description='The base number', example=2.0),
-    'exponent': fields.Float(required=True, description='The exponent number', example=3.0)
-})
-
-fibonacci_input_model = math_ns.model('FibonacciInput', {
-    'n': fields.Integer(required=True, description='Position in Fibonacci sequence (0-1000)', example=10)
-})
-
-factorial_input_model = math_ns.model('FactorialInput', {
-    'n': fields.Integer(required=True, description='Number for factorial calculation (0-100)', example=5)
-})
-
 math_response_model = math_ns.model('MathResponse', {
     'operation': fields.String(description='Type of operation performed'),
     'input_data': fields.Raw(description='The input parameters'),
@@ -65,176 +52,104 @@ def create_error_response(error_msg: str, operation: str, status_code: int = 400
     return error_response.model_dump(), status_code
 
 
-@math_ns.route('/power')
-class PowerCalculation(Resource):
-    @math_ns.doc('calculate_power')
-    @math_ns.expect(power_input_model)
-    def post(self):
-        """
-        Calculate base raised to the power of exponent (base^exponent)
-
-        Returns the result of base^exponent calculation.
-        """
-        start_time = time.time()
-
-        try:
-            # Get JSON data from request
-            data = request.get_json()
-            print(f"🔍 DEBUG: Received data: {data}")
-
-            if not data:
-                return create_error_response("No JSON data provided", "power", 400)
-
-            # Validate input using Pydantic
-            print(f"🔍 DEBUG: Creating PowerRequest...")
-            power_request = PowerRequest(**data)
-            print(f"🔍 DEBUG: PowerRequest created successfully: base={power_request.base}, exponent={power_request.exponent}")
-
-            # Perform calculation
-            print(f"🔍 DEBUG: Calling math_controller.calculate_power...")
-            result = math_controller.calculate_power(
-                power_request.base,
-                power_request.exponent
-            )
-            print(f"🔍 DEBUG: Calculation result: {result}")
-
-            # Calculate execution time
-            execution_time = (time.time() - start_time) * 1000
-            print(f"🔍 DEBUG: Execution time: {execution_time}ms")
-
-            # Save to database
-            print(f"🔍 DEBUG: Saving to database...")
-            db_manager.save_calculation(
-                operation="power",
-                input_data={"base": power_request.base, "exponent": power_request.exponent},
-                result=result,
-                execution_time_ms=round(execution_time, 2)
-            )
-
-            # Create response using Pydantic
-            print(f"🔍 DEBUG: Creating MathResponse...")
-            response = MathResponse(
-                operation="power",
-                input_data={"base": power_request.base, "exponent": power_request.exponent},
-                result=result,
-                execution_time_ms=round(execution_time, 2)
-            )
-            print(f"🔍 DEBUG: MathResponse created: {response.model_dump()}")
-
-            return response.model_dump(), 200
-
-        except ValidationError as e:
-            return create_error_response(f"Invalid input: {str(e)}", "power", 400)
-        except ValueError as e:
-            return create_error_response(str(e), "power", 400)
-        except Exception as e:
-            return create_error_response(f"Internal error: {str(e)}", "power", 500)
-
+def swagger_input_model(operation: Operation):
+    """
+    Build the Swagger input model for an operation from its Pydantic request model
 
-@math_ns.route('/fibonacci')
-class FibonacciCalculation(Resource):
-    @math_ns.doc('calculate_fibonacci')
-    @math_ns.expect(fibonacci_input_model)
-    def post(self):
-        """
-        Calculate the nth Fibonacci number
+    Args:
+        operation: Registered operation
+    """
+    model_fields = {}
+    for field_name, field_info in operation.request_model.model_fields.items():
+        field_class = fields.Integer if field_info.annotation is int else fields.Float
+        model_fields[field_name] = field_class(
+            required=field_info.is_required(),
+            description=field_info.description,
+            example=operation.example.get(field_name)
+        )
+    return math_ns.model(f"{operation.name.capitalize()}Input", model_fields)
+
+
+def run_operation(operation: Operation):
+    """
+    Shared request pipeline for every registered operation:
+    parse, validate, compute, time, persist and build the response
 
-        Returns the nth number in the Fibonacci sequence (0, 1, 1, 2, 3, 5, 8, 13, ...).
-        """
-        start_time = time.time()
+    Args:
+        operation: Registered operation to run
+    """
+    start_time = time.time()
+    name = operation.name
 
-        try:
+    try:
+        with span('parse'):
             data = request.get_json()
 
-            if not data:
-                return create_error_response("No JSON data provided", "fibonacci", 400)
+        if not data:
+            return create_error_response("No JSON data provided", name, 400)
 
-            # Validate input using Pydantic
-            fib_request = FibonacciRequest(**data)
+        # Validate input using Pydantic; the validated fields are the compute
+        # arguments, the stored input_data and the response input_data
+        with span('validate'):
+            input_data = operation.request_model(**data).model_dump()
 
-            # Perform calculation
-            result = math_controller.calculate_fibonacci(fib_request.n)
+        with span('compute'):
+            result = operation.compute(**input_data)
 
-            # Calculate execution time
-            execution_time = (time.time() - start_time) * 1000
+        # Calculate execution time
+        execution_time = round((time.time() - start_time) * 1000, 2)
 
-            # Save to database
+        with span('persist'):
             db_manager.save_calculation(
-                operation="fibonacci",
-                input_data={"n": fib_request.n},
-                result=result,
-                execution_time_ms=round(execution_time, 2)
-            )
-
-            # Create response using Pydantic
-            response = MathResponse(
-                operation="fibonacci",
-                input_data={"n": fib_request.n},
+                operation=name,
+                input_data=input_data,
                 result=result,
-                execution_time_ms=round(execution_time, 2)
+                execution_time_ms=execution_time
             )
 
-            return response.model_dump(), 200
+        with span('build'):
+            response_data = {
+                "operation": name,
+                "input_data": input_data,
+                "result": result if operation.serialize is None else operation.serialize(result),
+                "timestamp": datetime.now().isoformat(),
+                "execution_time_ms": execution_time
+            }
 
-        except ValidationError as e:
-            return create_error_response(f"Invalid input: {str(e)}", "fibonacci", 400)
-        except ValueError as e:
-            return create_error_response(str(e), "fibonacci", 400)
-        except Exception as e:
-            return create_error_response(f"Internal error: {str(e)}", "fibonacci", 500)
+        return response_data, 200
 
+    except ValidationError as e:
+        return create_error_response(f"Invalid input: {str(e)}", name, 400)
+    except ValueError as e:
+        return create_error_response(str(e), name, 400)
+    except Exception as e:
+        return create_error_response(f"Internal error: {str(e)}", name, 500)
 
-@math_ns.route('/factorial')
-class FactorialCalculation(Resource):
-    @math_ns.doc('calculate_factorial')
-    @math_ns.expect(factorial_input_model)
-    def post(self):
-        """
-        Calculate the factorial of n (n!)
 
-        Returns n! = n × (n-1) × (n-2) × ... × 1
-        """
-        start_time = time.time()
-
-        try:
-            data = request.get_json()
-
-            if not data:
-                return create_error_response("No JSON data provided", "factorial", 400)
-
-            # Validate input using Pydantic
-            factorial_request = FactorialRequest(**data)
-
-            # Perform calculation
-            result = math_controller.calculate_factorial(factorial_request.n)
+def register_operation_route(operation: Operation):
+    """
+    Generate the POST /<name> resource for an operation
 
-            # Calculate execution time
-            execution_time = (time.time() - start_time) * 1000
+    Args:
+        operation: Registered operation to expose
+    """
+    input_model = swagger_input_model(operation)
 
-            # Save to database
-            db_manager.save_calculation(
-                operation="factorial",
-                input_data={"n": factorial_request.n},
-                result=result,
-                execution_time_ms=round(execution_time, 2)
-            )
+    @math_ns.doc(f"calculate_{operation.name}", description=operation.description)
+    @math_ns.expect(input_model)
+    @math_ns.response(200, 'Success', math_response_model)
+    @math_ns.response(400, 'Invalid input', error_response_model)
+    def post(self):
+        return run_operation(operation)
 
-            # Create response using Pydantic
-            response = MathResponse(
-                operation="factorial",
-                input_data={"n": factorial_request.n},
-                result=result,
-                execution_time_ms=round(execution_time, 2)
-            )
+    post.__doc__ = operation.summary
+    resource = type(f"{operation.name.capitalize()}Calculation", (Resource,), {'post': post})
+    math_ns.add_resource(resource, f"/{operation.name}")
+    return resource
 
-            return response.model_dump(), 200
 
-        except ValidationError as e:
-            return create_error_response(f"Invalid input: {str(e)}", "factorial", 400)
-        except ValueError as e:
-            return create_error_response(str(e), "factorial", 400)
-        except Exception as e:
-            return create_error_response(f"Internal error: {str(e)}", "factorial", 500)
+for registered_operation in registry:
+    register_operation_route(registered_operation)
 
 
 @math_ns.route('/health')
@@ -250,30 +165,47 @@ class HealthCheck(Resource):
             "status": "healthy",
             "api_version": "v1",
             "available_endpoints": [
-                "POST /api/v1/power",
-                "POST /api/v1/fibonacci",
-                "POST /api/v1/factorial",
+                *(f"POST /api/v1/{name}" for name in registry.names()),
                 "GET /api/v1/history",
-                "GET /api/v1/stats"
-            ]
+                "GET /api/v1/stats",
+                "GET /api/v1/debug/slow-requests"
+            ],
+            "warmup": current_app.extensions['warmer'].status()
         }, 200
 
 
 @math_ns.route('/history')
 class CalculationHistory(Resource):
-    @math_ns.doc('get_calculation_history')
+    @math_ns.doc('get_calculation_history', params={
+        'limit': 'Maximum number of records (1-1000, default 50)',
+        'operation': f"Only this operation ({', '.join(registry.names())})",
+        'since': 'Created at or after this ISO time (UTC if no timezone)',
+        'until': 'Created at or before this ISO time (UTC if no timezone)',
+        'n': 'Input n (fibonacci, factorial)',
+        'base': 'Input base (power)',
+        'exponent': 'Input exponent (power)',
+        'min_result': 'Result greater than or equal to',
+        'max_result': 'Result less than or equal to'
+    })
     def get(self):
         """
         Get calculation history
 
-        Returns a list of all previous calculations stored in the database.
+        Returns the latest calculations stored in the database, optionally filtered.
+        Every filter combination is served from an index.
         """
         try:
-            history = db_manager.get_calculation_history(limit=50)
+            with span('validate'):
+                query = HistoryQuery(**request.args.to_dict())
+
+            with span('db.history'):
+                history = db_manager.get_calculation_history(limit=query.limit, **query.to_filters())
             return {
                 "total_records": len(history),
                 "calculations": history
             }, 200
+        except ValidationError as e:
+            return create_error_response(f"Invalid query: {str(e)}", "history", 400)
         except Exception as e:
             return {"error": f"Failed to retrieve history: {str(e)}"}, 500
 
@@ -288,7 +220,31 @@ class CalculationStats(Resource):
         Returns statistics about API usage including total calculations and performance metrics.
         """
         try:
-            stats = db_manager.get_operation_stats()
+            with span('db.stats'):
+                stats = db_manager.get_operation_stats()
+
+            # Shared result cache counters, when MATH_SHARED_CACHE is enabled
+            cache = getattr(math_controller, 'cache', None)
+            if cache is not None:
+                stats['cache'] = cache.stats()
+
             return stats, 200
         except Exception as e:
-            return {"error": f"Failed to retrieve stats: {str(e)}"}, 500
\ No newline at end of file
+            return {"error": f"Failed to retrieve stats: {str(e)}"}, 500
+
+
+@math_ns.route('/debug/slow-requests')
+class SlowRequests(Resource):
+    @math_ns.doc('get_slow_requests')
+    def get(self):
+        """
+        Get recently captured slow requests
+
+        Returns the span tree of every traced request slower than the configured threshold, newest first.
+        """
+        tracer = current_app.extensions['tracer']
+        return {
+            "sample_rate": tracer.sample_rate,
+            "slow_threshold_ms": tracer.slow_threshold_ms,
+            "requests": tracer.get_slow_requests()
+        }, 200
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Cache warm-up from calculation history
+Precomputes the most requested inputs in the background so a fresh process does not start cold
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from flask import Flask
+
+
+class CacheWarmer:
+    """
+    Background warm-up of the result cache from the most frequent recent inputs
+
+    Warm-up runs on a daemon thread, so the app serves requests while it
+    is in progress. A forked worker starts its own warm-up on its first
+    request (threads do not survive fork); with the shared cache most of
+    that work is already done by the parent.
+    """
+
+    def __init__(self, registry, db_manager, enabled: bool = True,
+                 top_k: int = 50, lookback_hours: float = 168.0):
+        """
+        Args:
+            registry: OperationRegistry whose operations are warmed
+            db_manager: Database manager providing get_frequent_inputs()
+            enabled: False when there is no result cache to warm
+            top_k: Inputs to precompute per operation
+            lookback_hours: How far back in history to count requests
+        """
+        self.registry = registry
+        self.db_manager = db_manager
+        self.enabled = enabled
+        self.top_k = top_k
+        self.lookback_hours = lookback_hours
+
+        self._lock = threading.Lock()
+        self._started_pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._status: Dict[str, Any] = {'state': 'pending' if enabled else 'disabled'}
+
+    def init_app(self, app: Flask):
+        """
+        Start warm-up now and again in any worker forked from this process
+        """
+        app.extensions['warmer'] = self
+        app.before_request(self.ensure_started)
+        self.ensure_started()
+
+    def ensure_started(self):
+        """
+        Start the warm-up thread once per process
+        """
+        if not self.enabled or self._started_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+            self._status = {'state': 'running', 'operations': {}}
+            self._thread = threading.Thread(target=self.run, name='cache-warmup', daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the current warm-up finishes (useful for tests and scripts)
+
+        Returns:
+            bool: True if warm-up is no longer running
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self._status['state'] != 'running'
+
+    def run(self):
+        """
+        Precompute the top-K inputs of every operation, hottest and most expensive first
+        """
+        start_time = time.time()
+        since = datetime.now(timezone.utc) - timedelta(hours=self.lookback_hours)
+        since = since.strftime('%Y-%m-%d %H:%M:%S')
+        operations_status = self._status.setdefault('operations', {})
+
+        try:
+            for operation in self.registry:
+                candidates = self.db_manager.get_frequent_inputs(operation.name, self.top_k, since)
+                recent_requests = sum(count for _, count in candidates)
+                progress = {
+                    'planned': len(candidates),
+                    'warmed': 0,
+                    'failed': 0,
+                    'coverage': 0.0
+                }
+                operations_status[operation.name] = progress
+
+                # Validate first so bad historical inputs cannot break the cost model
+                prepared = []
+                for input_data, count in candidates:
+                    try:
+                        params = operation.request_model(**input_data).model_dump()
+                        prepared.append((count * operation.cost(**params), count, params))
+                    except Exception:
+                        progress['failed'] += 1
+                prepared.sort(key=lambda item: item[0], reverse=True)
+
+                covered_requests = 0
+                for _, count, params in prepared:
+                    try:
+                        operation.compute(**params)
+                    except Exception:
+                        progress['failed'] += 1
+                        continue
+                    progress['warmed'] += 1
+                    covered_requests += count
+                    progress['coverage'] = round(covered_requests / recent_requests, 4)
+
+            self._status['state'] = 'done'
+            print(f"🔥 Cache warm-up finished in {(time.time() - start_time):.2f}s")
+
+        except Exception as e:
+            self._status['state'] = 'failed'
+            self._status['error'] = str(e)
+            print(f"❌ Cache warm-up failed: {e}")
+
+        finally:
+            self._status['duration_ms'] = round((time.time() - start_time) * 1000, 2)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Warm-up progress for /health
+
+        coverage is the share of recent top-K requests whose input is now cached.
+        """
+        status = dict(self._status)
+        if 'operations' in status:
+            # list() snapshots the items while the warm-up thread may still add operations
+            status['operations'] = {name: dict(progress)
+                                    for name, progress in list(status['operations'].items())}
+        return status
@@ -0,0 +1,12 @@
+"""
+Pytest configuration
+Points the global database manager at a throwaway file so tests never touch math_calculations.db
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault('MATH_DB_PATH', os.path.join(tempfile.mkdtemp(), 'test_calculations.db'))
+
+# test_api.py is a manual script that needs a running server
+collect_ignore = ['test_api.py']
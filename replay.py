@@ -0,0 +1,259 @@
+"""
+Replay captured traffic against the API and report latency and throughput
+Captures are written by the app when MATH_CAPTURE_PATH is set, one <path>.<pid> file per worker
+
+Examples:
+    python replay.py captures/requests.jsonl*                      # in-process, original timing
+    python replay.py captures/requests.jsonl* --speed 10 --concurrency 8
+    python replay.py captures/requests.jsonl* --speed 0 --target http://localhost:5000
+    python replay.py captures/requests.jsonl* --speed 0 --output new.json --compare old.json
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+
+def load_capture(paths: List[str]) -> List[Dict[str, Any]]:
+    """
+    Read capture files (including rotated ones) and order records by arrival
+
+    Args:
+        paths: JSONL capture files
+
+    Returns:
+        List of captured request records
+    """
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as capture_file:
+            for line in capture_file:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+    records.sort(key=lambda record: record['ts'])
+    return records
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    return {
+        'count': len(latencies),
+        'mean_ms': round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p90_ms': round(percentile(latencies, 0.90), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'max_ms': round(max(latencies), 3) if latencies else 0.0
+    }
+
+
+class InProcessTarget:
+    """
+    Sends requests to create_app() through Flask's test client (one per thread)
+    """
+
+    def __init__(self):
+        from app import create_app
+
+        # Replayed traffic must not be appended to the capture being replayed
+        capture_path = os.environ.pop('MATH_CAPTURE_PATH', None)
+        try:
+            self.app = create_app()
+        finally:
+            if capture_path is not None:
+                os.environ['MATH_CAPTURE_PATH'] = capture_path
+        self._local = threading.local()
+
+    def send(self, record: Dict[str, Any]) -> int:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(record['path'], method=record['method'],
+                               json=record.get('payload'), query_string=record.get('query'))
+        return response.status_code
+
+
+class HttpTarget:
+    """
+    Sends requests to a running server (one HTTP session per thread)
+    """
+
+    def __init__(self, base_url: str):
+        import requests
+        self.requests = requests
+        self.base_url = base_url.rstrip('/')
+        self._local = threading.local()
+
+    def send(self, record: Dict[str, Any]) -> int:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self.requests.Session()
+        response = session.request(record['method'], self.base_url + record['path'],
+                                   json=record.get('payload'), params=record.get('query'))
+        return response.status_code
+
+
+def replay(records: List[Dict[str, Any]], target, speed: float = 1.0,
+           concurrency: int = 4) -> Dict[str, Any]:
+    """
+    Replay records against a target and measure the results
+
+    Args:
+        records: Captured requests, ordered by arrival
+        target: Object with send(record) -> status code
+        speed: Time scaling of the original arrivals (10 = ten times faster, 0 = as fast as possible)
+        concurrency: Maximum requests in flight
+
+    Returns:
+        Report with throughput, latency (overall and per operation), schedule lag and errors
+    """
+    results = []
+    results_lock = threading.Lock()
+
+    def send(record, scheduled_at):
+        started = time.perf_counter()
+        try:
+            status = target.send(record)
+        except Exception as e:
+            status = f"error: {e}"
+        finished = time.perf_counter()
+        with results_lock:
+            results.append({
+                'operation': record.get('operation'),
+                'status': status,
+                'latency_ms': (finished - started) * 1000,
+                # How late the request started compared with its scheduled arrival
+                'lag_ms': max(0.0, (started - scheduled_at) * 1000),
+                'captured_latency_ms': record.get('latency_ms')
+            })
+
+    first_ts = records[0]['ts'] if records else 0.0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for record in records:
+            scheduled_at = start
+            if speed > 0:
+                scheduled_at = start + (record['ts'] - first_ts) / speed
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            executor.submit(send, record, scheduled_at)
+    wall_time = time.perf_counter() - start
+
+    by_operation: Dict[str, List[float]] = {}
+    status_counts: Dict[str, int] = {}
+    for result in results:
+        by_operation.setdefault(result['operation'], []).append(result['latency_ms'])
+        status_counts[str(result['status'])] = status_counts.get(str(result['status']), 0) + 1
+
+    errors = sum(1 for result in results
+                 if not isinstance(result['status'], int) or result['status'] >= 400)
+    captured = [result['captured_latency_ms'] for result in results
+                if result['captured_latency_ms'] is not None]
+
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'status_counts': status_counts,
+        'speed': speed,
+        'concurrency': concurrency,
+        'wall_time_s': round(wall_time, 3),
+        'throughput_rps': round(len(results) / wall_time, 2) if wall_time > 0 else 0.0,
+        'latency': summarize([result['latency_ms'] for result in results]),
+        'latency_by_operation': {operation: summarize(latencies)
+                                 for operation, latencies in sorted(by_operation.items())},
+        'schedule_lag': summarize([result['lag_ms'] for result in results]),
+        'captured_latency': summarize(captured)
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """
+    Compare headline metrics of two reports (e.g. two builds)
+
+    Returns:
+        metric -> {'baseline', 'current', 'change_pct'}
+    """
+    metrics = {
+        'throughput_rps': (baseline['throughput_rps'], current['throughput_rps']),
+        'errors': (baseline['errors'], current['errors'])
+    }
+    for key in ('mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'):
+        metrics[f'latency.{key}'] = (baseline['latency'][key], current['latency'][key])
+
+    comparison = {}
+    for metric, (old, new) in metrics.items():
+        change = round((new - old) / old * 100, 2) if old else None
+        comparison[metric] = {'baseline': old, 'current': new, 'change_pct': change}
+    return comparison
+
+
+def print_report(report: Dict[str, Any], comparison: Optional[Dict[str, Dict[str, float]]] = None):
+    """Print a human-readable report"""
+    latency = report['latency']
+    print(f"📊 Replayed {report['requests']} requests in {report['wall_time_s']}s "
+          f"(speed={report['speed'] or 'max'}, concurrency={report['concurrency']})")
+    print(f"🚀 Throughput: {report['throughput_rps']} req/s")
+    print(f"⏱️  Latency: mean {latency['mean_ms']}ms, p50 {latency['p50_ms']}ms, "
+          f"p90 {latency['p90_ms']}ms, p99 {latency['p99_ms']}ms, max {latency['max_ms']}ms")
+    for operation, summary in report['latency_by_operation'].items():
+        print(f"   {operation}: {summary['count']} requests, p50 {summary['p50_ms']}ms, "
+              f"p99 {summary['p99_ms']}ms")
+    print(f"🐢 Schedule lag p99: {report['schedule_lag']['p99_ms']}ms")
+    print(f"❌ Errors: {report['errors']} {report['status_counts']}")
+
+    if comparison:
+        print("\n🔍 Compared with baseline:")
+        for metric, values in comparison.items():
+            change = 'n/a' if values['change_pct'] is None else f"{values['change_pct']:+}%"
+            print(f"   {metric}: {values['baseline']} -> {values['current']} ({change})")
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Replay captured Math Microservice traffic')
+    parser.add_argument('captures', nargs='+', help='Capture JSONL files (rotated files allowed)')
+    parser.add_argument('--target', default='inprocess',
+                        help="'inprocess' (default) or a server URL such as http://localhost:5000")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Time scaling: 1 = original pace, 10 = 10x faster, 0 = as fast as possible')
+    parser.add_argument('--concurrency', type=int, default=4, help='Maximum requests in flight')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--compare', help='Baseline JSON report to compare against')
+    args = parser.parse_args(argv)
+
+    records = load_capture(args.captures)
+    target = InProcessTarget() if args.target == 'inprocess' else HttpTarget(args.target)
+    report = replay(records, target, speed=args.speed, concurrency=args.concurrency)
+
+    comparison = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            comparison = compare_reports(json.load(baseline_file), report)
+        report['comparison'] = comparison
+
+    print_report(report, comparison)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"💾 Report written to {args.output}")
+    return report
+
+
+if __name__ == '__main__':
+    main()
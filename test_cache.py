@@ -0,0 +1,128 @@
+"""
+Tests for the shared result cache
+Run with: python -m pytest test_cache.py
+"""
+
+import math
+import multiprocessing
+
+import pytest
+
+from app.cache import SharedResultCache
+from app.controllers import CachedMathController, MathController
+
+
+@pytest.fixture
+def cache(tmp_path):
+    shared_cache = SharedResultCache(str(tmp_path / 'cache.bin'), sets=16, ways=4)
+    yield shared_cache
+    shared_cache.close()
+
+
+def test_big_integers_round_trip(cache):
+    fib_1000 = MathController.calculate_fibonacci(1000)
+    factorial_100 = math.factorial(100)
+
+    assert cache.set('fibonacci:1000', fib_1000)
+    assert cache.set('factorial:100', factorial_100)
+
+    assert cache.get('fibonacci:1000') == fib_1000
+    assert cache.get('factorial:100') == factorial_100
+    assert cache.get('missing') is None
+    assert cache.stats()['hits'] == 2
+
+
+def test_floats_round_trip(cache):
+    cache.set('power:2:0.5', 2 ** 0.5)
+
+    assert cache.get('power:2:0.5') == 2 ** 0.5
+
+
+def test_full_set_evicts_least_recently_used(tmp_path):
+    cache = SharedResultCache(str(tmp_path / 'cache.bin'), sets=1, ways=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_oversize_values_are_rejected(tmp_path):
+    cache = SharedResultCache(str(tmp_path / 'cache.bin'), sets=4, ways=2, value_size=32)
+
+    assert not cache.set('big', 7 ** 2000)
+    assert not cache.set('k' * 100, 1)
+    assert cache.get('big') is None
+    assert cache.stats()['rejected'] == 2
+
+
+def test_distinct_keys_spread_over_the_sets(tmp_path):
+    cache = SharedResultCache(str(tmp_path / 'cache.bin'))
+    keys = [f'fibonacci:{n}' for n in range(1001)]
+    keys += [f'power:{float(base)!r}:{float(exponent)!r}' for base in range(100) for exponent in range(100)]
+    for key in keys:
+        cache.set(key, 1)
+
+    # 11,001 keys in 32,768 slots: a well spread hash keeps almost all of them
+    kept = sum(1 for key in keys if cache.get(key) == 1)
+    assert kept >= 0.99 * len(keys)
+    assert cache.stats()['evictions'] <= 0.01 * len(keys)
+    cache.close()
+
+
+def test_errors_are_not_cached(cache):
+    controller = CachedMathController(cache)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            controller.calculate_fibonacci(-1)
+
+    assert cache.stats()['hits'] == 0
+    assert controller.calculate_factorial(5) == 120
+    assert controller.calculate_factorial(5) == 120
+    assert cache.stats()['hits'] == 1
+
+
+def test_layout_mismatch_is_refused(tmp_path):
+    path = str(tmp_path / 'cache.bin')
+    SharedResultCache(path, sets=64, ways=4).set('x', 1)
+
+    with pytest.raises(ValueError):
+        SharedResultCache(path, sets=4, ways=4)
+    # The original file is left intact for the workers still using it
+    assert SharedResultCache(path, sets=64, ways=4).get('x') == 1
+
+
+def fill_cache(path, worker):
+    cache = SharedResultCache(path, sets=256, ways=4)
+    controller = CachedMathController(cache)
+    for n in range(40):
+        controller.calculate_fibonacci((n * (worker + 1)) % 30)
+    cache.set(f'worker:{worker}', worker)
+
+
+def test_workers_share_one_cache(tmp_path):
+    path = str(tmp_path / 'cache.bin')
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=fill_cache, args=(path, worker)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    cache = SharedResultCache(path, sets=256, ways=4)
+    # Counters are kept in the file, so every worker's lookups are included
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 4 * 40
+    assert stats['hits'] > 0
+
+    # Entries written by other processes are visible here, and none are torn
+    assert [cache.get(f'worker:{worker}') for worker in range(4)] == [0, 1, 2, 3]
+    for n in range(30):
+        value = cache.get(f'fibonacci:{n}')
+        assert value is None or value == MathController.calculate_fibonacci(n)
@@ -0,0 +1,209 @@
+"""
+Tests for the database layer
+Run with: python -m pytest test_database.py
+"""
+
+import itertools
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from app.database import (
+    CREATE_CALCULATIONS_TABLE, HISTORY_FILTERS, DatabaseManager, ShardedDatabaseManager,
+    apply_schema, build_history_query, create_database_manager
+)
+
+
+def insert_row(shard_path, operation, created_at, timestamp, execution_time_ms=1.0):
+    """Write a row with explicit times straight into a shard file"""
+    conn = sqlite3.connect(shard_path)
+    conn.execute('''
+        INSERT INTO calculations
+        (operation, input_data, result, execution_time_ms, timestamp, created_at)
+        VALUES (?, '{}', 1, ?, ?, ?)
+    ''', (operation, execution_time_ms, timestamp, created_at))
+    conn.commit()
+    conn.close()
+
+
+def test_shard_routing_by_window(tmp_path):
+    db = ShardedDatabaseManager(str(tmp_path), window='day')
+    when = datetime(2024, 3, 5, 12, tzinfo=timezone.utc)
+
+    assert db.shard_path_for('power', when) == os.path.join(str(tmp_path), 'calc_20240305.db')
+
+
+def test_shard_routing_by_operation(tmp_path):
+    db = ShardedDatabaseManager(str(tmp_path), window='month', by_operation=True)
+    db.save_calculation('power', {'base': 2, 'exponent': 3}, 8, 0.1)
+    db.save_calculation('fibonacci', {'n': 10}, 55, 0.1)
+
+    window = datetime.now(timezone.utc).strftime('%Y%m')
+    names = sorted(os.path.basename(path) for path in db.list_shards())
+    # No unsuffixed shard is created when splitting by operation
+    assert names == [f'calc_{window}_fibonacci.db', f'calc_{window}_power.db']
+
+
+def test_operation_names_with_separators_stay_visible(tmp_path):
+    db = ShardedDatabaseManager(str(tmp_path), window='month', by_operation=True)
+    db.save_calculation('nth_prime', {'n': 5}, 11, 0.1)
+    db.save_calculation('gcd-lcm', {'a': 4, 'b': 6}, 2, 0.1)
+    db.save_calculation('log.base', {'x': 8}, 3, 0.1)
+
+    window = datetime.now(timezone.utc).strftime('%Y%m')
+    names = sorted(os.path.basename(path) for path in db.list_shards())
+    assert names == [f'calc_{window}_gcd-lcm.db', f'calc_{window}_log-base.db',
+                     f'calc_{window}_nth_prime.db']
+
+    assert len(db.get_calculation_history()) == 3
+    assert [r['result'] for r in db.get_calculation_history(operation='nth_prime')] == [11]
+    assert [r['result'] for r in db.get_calculation_history(operation='log.base')] == [3]
+    assert db.get_operation_stats()['total_calculations'] == 3
+
+
+def test_history_merge_orders_rows_across_shards(tmp_path):
+    db = ShardedDatabaseManager(str(tmp_path), by_operation=True)
+    when = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for operation in ('power', 'fibonacci'):
+        db._ensure_shard(db.shard_path_for(operation, when))
+
+    # Same created_at second, interleaved across the two shards
+    for i in range(6):
+        operation = 'power' if i % 2 == 0 else 'fibonacci'
+        insert_row(db.shard_path_for(operation, when), operation,
+                   '2024-01-01 00:00:00', f'2024-01-01T00:00:00.{i:06d}')
+
+    history = db.get_calculation_history(limit=4)
+
+    assert [r['timestamp'][-1] for r in history] == ['5', '4', '3', '2']
+    assert [r['operation'] for r in history] == ['fibonacci', 'power', 'fibonacci', 'power']
+
+
+def test_stats_are_summed_across_shards(tmp_path):
+    db = ShardedDatabaseManager(str(tmp_path), window='month')
+    for month, time_ms in ((1, 2.0), (2, 4.0)):
+        shard_path = db.shard_path_for(when=datetime(2024, month, 1, tzinfo=timezone.utc))
+        db._ensure_shard(shard_path)
+        insert_row(shard_path, 'power', f'2024-0{month}-01 00:00:00', 'x', time_ms)
+    db.save_calculation('factorial', {'n': 5}, 120, 1.0)
+
+    stats = db.get_operation_stats()
+
+    assert stats['total_calculations'] == 3
+    assert stats['operations_count'] == {'power': 2, 'factorial': 1}
+    assert stats['average_execution_times']['power'] == pytest.approx(3.0)
+    assert stats['shard_count'] == 3
+
+
+def test_archive_shards_skips_current_window(tmp_path):
+    db = ShardedDatabaseManager(str(tmp_path), window='month')
+    old_shard = db.shard_path_for(when=datetime(2020, 1, 1, tzinfo=timezone.utc))
+    db._ensure_shard(old_shard)
+    db.save_calculation('power', {'base': 2, 'exponent': 2}, 4, 0.1)
+
+    archived = db.archive_shards('999999')
+
+    assert [os.path.basename(path) for path in archived] == ['calc_202001.db']
+    assert db.list_shards() == [db.shard_path_for()]
+    assert db.get_operation_stats()['total_calculations'] == 1
+
+
+def test_invalid_shard_window_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setenv('MATH_DB_SHARD_DIR', str(tmp_path))
+    monkeypatch.setenv('MATH_DB_SHARD_WINDOW', 'week')
+
+    with pytest.raises(ValueError):
+        create_database_manager()
+
+
+@pytest.fixture(scope='module')
+def plan_conn(tmp_path_factory):
+    db = DatabaseManager(str(tmp_path_factory.mktemp('plans') / 'calc.db'))
+    conn = sqlite3.connect(db.db_path)
+    yield conn
+    conn.close()
+
+
+def query_plan(conn, filters):
+    """EXPLAIN QUERY PLAN details for a history query"""
+    sql, params = build_history_query(50, filters)
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+
+@pytest.mark.parametrize('filter_names', [
+    combo
+    for size in range(len(HISTORY_FILTERS) + 1)
+    for combo in itertools.combinations(HISTORY_FILTERS, size)
+], ids=lambda combo: '+'.join(combo) or 'none')
+def test_every_history_filter_shape_uses_an_index(plan_conn, filter_names):
+    plan = query_plan(plan_conn, {name: 1 for name in filter_names})
+
+    table_access = [step for step in plan if 'calculations' in step]
+    assert table_access, plan
+    for step in table_access:
+        assert 'USING INDEX' in step or 'USING COVERING INDEX' in step, plan
+
+
+@pytest.mark.parametrize('filter_names, index_name', [
+    (('operation',), 'idx_calculations_operation_created'),
+    (('operation', 'since', 'until'), 'idx_calculations_operation_created'),
+    (('since',), 'idx_calculations_created'),
+    (('n',), 'idx_calculations_input_n'),
+    (('base', 'exponent'), 'idx_calculations_input_base'),
+    (('exponent',), 'idx_calculations_input_exponent'),
+])
+def test_common_filters_search_their_index(plan_conn, filter_names, index_name):
+    plan = query_plan(plan_conn, {name: 1 for name in filter_names})
+
+    assert plan[0].startswith(f'SEARCH calculations USING INDEX {index_name}'), plan
+    # The index order already matches ORDER BY, so no sort step is needed
+    assert not any('TEMP B-TREE' in step for step in plan), plan
+
+
+def test_history_filters(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'calc.db'))
+    db.save_calculation('power', {'base': 2, 'exponent': 10}, 1024.0, 0.1)
+    db.save_calculation('power', {'base': 3, 'exponent': 2}, 9.0, 0.1)
+    db.save_calculation('fibonacci', {'n': 10}, 55, 0.1)
+    db.save_calculation('factorial', {'n': 10}, 3628800, 0.1)
+
+    assert len(db.get_calculation_history(operation='power')) == 2
+    assert [r['result'] for r in db.get_calculation_history(base=2)] == [1024.0]
+    assert {r['operation'] for r in db.get_calculation_history(n=10)} == {'fibonacci', 'factorial'}
+    assert [r['operation'] for r in db.get_calculation_history(min_result=50, max_result=2000)] == [
+        'fibonacci', 'power']
+    assert db.get_calculation_history(since='2999-01-01 00:00:00') == []
+    assert len(db.get_calculation_history(until='2999-01-01 00:00:00')) == 4
+
+
+def test_existing_database_is_migrated(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.execute(CREATE_CALCULATIONS_TABLE)
+    conn.execute('''
+        INSERT INTO calculations (operation, input_data, result, execution_time_ms, timestamp)
+        VALUES ('fibonacci', '{"n": 7}', 13, 0.1, 'x')
+    ''')
+    conn.commit()
+
+    db = DatabaseManager(path)
+
+    assert [r['result'] for r in db.get_calculation_history(n=7)] == [13]
+    apply_schema(conn)  # running the migration again is a no-op
+
+
+def test_sharded_history_filters_skip_other_shards(tmp_path):
+    db = ShardedDatabaseManager(str(tmp_path), window='month', by_operation=True)
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    for operation in ('power', 'fibonacci'):
+        db._ensure_shard(db.shard_path_for(operation, old))
+        insert_row(db.shard_path_for(operation, old), operation, '2020-01-01 00:00:00', 'x')
+    db.save_calculation('fibonacci', {'n': 3}, 2, 0.1)
+
+    shards = db._shards_matching({'operation': 'fibonacci', 'until': '2020-12-31 23:59:59'})
+    assert [os.path.basename(path) for path in shards] == ['calc_202001_fibonacci.db']
+
+    history = db.get_calculation_history(operation='fibonacci', n=3)
+    assert [r['result'] for r in history] == [2]
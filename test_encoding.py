@@ -0,0 +1,132 @@
+"""
+Tests for response compression and binary content negotiation
+Run with: python -m pytest test_encoding.py
+"""
+
+import gzip
+import json
+import math
+import zlib
+
+import pytest
+
+from app import create_app
+from app.database import db_manager
+from app.encoding import ResponseCompressor
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('MATH_COMPRESS_MIN_SIZE', '200')
+    # History assertions below count rows, so start from an empty table
+    db_manager.clear_history()
+    return create_app().test_client()
+
+
+def test_large_responses_are_gzipped(client):
+    for n in range(20):
+        client.post('/api/v1/fibonacci', json={'n': n})
+
+    response = client.get('/api/v1/history', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(json.loads(gzip.decompress(response.data))['calculations']) == 20
+
+
+def test_deflate_is_supported(client):
+    response = client.post('/api/v1/factorial', json={'n': 100}, headers={'Accept-Encoding': 'deflate'})
+
+    assert response.headers['Content-Encoding'] == 'deflate'
+    assert json.loads(zlib.decompress(response.data))['result'] == math.factorial(100)
+
+
+def test_partial_content_is_not_compressed(client):
+    response = client.get('/swaggerui/swagger-ui-bundle.js',
+                          headers={'Range': 'bytes=0-99', 'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 206
+    assert 'Content-Encoding' not in response.headers
+    assert len(response.data) == 100
+
+
+def test_compressed_variant_gets_a_weak_etag(client):
+    identity = client.get('/swaggerui/swagger-ui-bundle.js')
+    compressed = client.get('/swaggerui/swagger-ui-bundle.js', headers={'Accept-Encoding': 'gzip'})
+
+    etag, weak = identity.get_etag()
+    assert etag and not weak
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.get_etag() == (etag, True)
+
+
+def test_small_responses_are_not_compressed(monkeypatch):
+    monkeypatch.setenv('MATH_COMPRESS_MIN_SIZE', '100000')
+    client = create_app().test_client()
+
+    response = client.get('/api/v1/health', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['status'] == 'healthy'
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('deflate, gzip', 'gzip'),
+    ('gzip;q=0.5, deflate', 'deflate'),
+    ('gzip;q=0, deflate;q=0', None),
+    ('*;q=0.1, gzip;q=0', 'deflate'),
+])
+def test_choose_encoding_honours_q_values(header, expected):
+    compressor = ResponseCompressor()
+    compressor.encoders.pop('zstd', None)
+    compressor.encoders.pop('br', None)
+
+    assert compressor.choose_encoding(header) == expected
+
+
+def test_streamed_responses_are_compressed_in_chunks():
+    compressor = ResponseCompressor()
+    chunks = list(compressor._stream([b'a' * 5000, 'b' * 5000], compressor.encoders['gzip']()))
+
+    assert gzip.decompress(b''.join(chunks)) == b'a' * 5000 + b'b' * 5000
+
+
+def test_msgpack_keeps_big_integers_exact(client):
+    msgpack = pytest.importorskip('msgpack')
+    from app.encoding import msgpack_ext_hook
+
+    response = client.post('/api/v1/factorial', json={'n': 100}, headers={'Accept': 'application/msgpack'})
+
+    assert response.mimetype == 'application/msgpack'
+    data = msgpack.unpackb(response.data, ext_hook=msgpack_ext_hook)
+    assert data['result'] == math.factorial(100)
+
+
+def test_cbor_keeps_big_integers_exact(client):
+    cbor2 = pytest.importorskip('cbor2')
+
+    response = client.post('/api/v1/fibonacci', json={'n': 1000}, headers={'Accept': 'application/cbor'})
+
+    assert response.mimetype == 'application/cbor'
+    assert cbor2.loads(response.data)['result'] == client.post(
+        '/api/v1/fibonacci', json={'n': 1000}).get_json()['result']
+
+
+def test_json_stays_the_default(client):
+    response = client.post('/api/v1/factorial', json={'n': 5}, headers={'Accept': '*/*'})
+
+    assert response.mimetype == 'application/json'
+
+
+@pytest.mark.parametrize('encoding, module', [('br', 'brotli'), ('zstd', 'zstandard')])
+def test_optional_encodings(client, encoding, module):
+    pytest.importorskip(module)
+    for n in range(20):
+        client.post('/api/v1/fibonacci', json={'n': n})
+
+    response = client.get('/api/v1/history', headers={'Accept-Encoding': encoding})
+
+    assert response.headers['Content-Encoding'] == encoding
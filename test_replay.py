@@ -0,0 +1,139 @@
+"""
+Tests for traffic capture and offline replay
+Run with: python -m pytest test_replay.py
+"""
+
+import json
+
+import pytest
+
+from app import capture, create_app
+from replay import InProcessTarget, compare_reports, load_capture, main, percentile, replay
+
+
+@pytest.fixture
+def capture_path(tmp_path, monkeypatch):
+    path = tmp_path / 'requests.jsonl'
+    monkeypatch.setenv('MATH_CAPTURE_PATH', str(path))
+    return path
+
+
+def captured_files(capture_path):
+    # Every process writes <path>.<pid> plus its rotated files
+    return sorted(str(path) for path in capture_path.parent.glob(capture_path.name + '*'))
+
+
+def capture_traffic(app):
+    client = app.test_client()
+    client.post('/api/v1/fibonacci', json={'n': 10})
+    client.post('/api/v1/power', json={'base': 2, 'exponent': 8})
+    client.post('/api/v1/factorial', json={'n': -1})
+    client.get('/api/v1/history?operation=power&limit=5')
+    client.get('/swagger.json')  # outside /api/v1: not captured
+    app.extensions['capture'].close()
+
+
+def test_requests_are_captured(capture_path):
+    capture_traffic(create_app())
+
+    records = load_capture(captured_files(capture_path))
+
+    assert [r['operation'] for r in records] == ['fibonacci', 'power', 'factorial', 'history']
+    assert records[0]['payload'] == {'n': 10}
+    assert records[2]['status'] == 400
+    assert records[3]['query'] == {'operation': 'power', 'limit': '5'}
+    assert all(r['latency_ms'] >= 0 for r in records)
+    assert records == sorted(records, key=lambda r: r['ts'])
+
+
+def test_capture_directory_is_created(tmp_path, monkeypatch):
+    capture_path = tmp_path / 'captures' / 'requests.jsonl'
+    monkeypatch.setenv('MATH_CAPTURE_PATH', str(capture_path))
+
+    capture_traffic(create_app())
+
+    assert len(load_capture(captured_files(capture_path))) == 4
+
+
+def test_each_process_writes_its_own_file(capture_path, monkeypatch):
+    app = create_app()
+    client = app.test_client()
+    client.post('/api/v1/fibonacci', json={'n': 1})
+    # A pre-forked worker has another pid and must not share the parent's file
+    monkeypatch.setattr(capture.os, 'getpid', lambda: 999999)
+    client.post('/api/v1/fibonacci', json={'n': 2})
+    app.extensions['capture'].close()
+
+    files = captured_files(capture_path)
+    assert len(files) == 2
+    assert files[-1].endswith('requests.jsonl.999999')
+    assert [r['payload']['n'] for r in load_capture(files)] == [1, 2]
+
+
+def test_capture_is_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv('MATH_CAPTURE_PATH', raising=False)
+
+    assert 'capture' not in create_app().extensions
+
+
+def test_capture_files_rotate(capture_path, monkeypatch):
+    monkeypatch.setenv('MATH_CAPTURE_MAX_BYTES', '500')
+    monkeypatch.setenv('MATH_CAPTURE_BACKUPS', '50')
+    app = create_app()
+    client = app.test_client()
+    for n in range(20):
+        client.post('/api/v1/fibonacci', json={'n': n})
+    app.extensions['capture'].close()
+
+    rotated = sorted(capture_path.parent.glob('requests.jsonl*'))
+    assert len(rotated) > 1
+    records = load_capture([str(path) for path in rotated])
+    assert [r['payload']['n'] for r in records] == list(range(20))
+
+
+def test_replay_in_process_reports_latency_and_throughput(capture_path):
+    capture_traffic(create_app())
+    records = load_capture(captured_files(capture_path))
+
+    report = replay(records, InProcessTarget(), speed=0, concurrency=2)
+
+    assert len(load_capture(captured_files(capture_path))) == 4  # replayed traffic is not re-captured
+
+    assert report['requests'] == 4
+    assert report['errors'] == 1
+    assert report['status_counts'] == {'200': 3, '400': 1}
+    assert report['throughput_rps'] > 0
+    assert set(report['latency_by_operation']) == {'fibonacci', 'power', 'factorial', 'history'}
+    assert report['captured_latency']['count'] == 4
+
+
+def test_replay_keeps_scaled_arrival_times():
+    class RecordingTarget:
+        def send(self, record):
+            return 200
+
+    records = [{'ts': 100.0, 'operation': 'a'}, {'ts': 100.5, 'operation': 'b'}]
+
+    report = replay(records, RecordingTarget(), speed=5, concurrency=1)
+
+    # 0.5s of captured traffic at 5x takes about 0.1s
+    assert 0.09 <= report['wall_time_s'] < 0.5
+
+
+def test_reports_can_be_compared(capture_path, tmp_path):
+    capture_traffic(create_app())
+    baseline_path = tmp_path / 'baseline.json'
+    main(captured_files(capture_path) + ['--speed', '0', '--output', str(baseline_path)])
+
+    report = main(captured_files(capture_path) + ['--speed', '0', '--compare', str(baseline_path)])
+
+    assert set(report['comparison']) >= {'throughput_rps', 'errors', 'latency.p99_ms'}
+    assert compare_reports(json.loads(baseline_path.read_text()), report)['errors']['change_pct'] == 0
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
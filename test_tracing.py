@@ -0,0 +1,81 @@
+"""
+Tests for per-request tracing
+Run with: python -m pytest test_tracing.py
+"""
+
+from app import create_app
+from app.tracing import Trace, span
+
+
+def make_client(monkeypatch, sample_rate='1', slow_ms='0'):
+    monkeypatch.setenv('MATH_TRACE_SAMPLE_RATE', sample_rate)
+    monkeypatch.setenv('MATH_TRACE_SLOW_MS', slow_ms)
+    return create_app().test_client()
+
+
+def test_server_timing_header_lists_each_stage(monkeypatch):
+    client = make_client(monkeypatch)
+
+    response = client.post('/api/v1/power', json={'base': 2, 'exponent': 3},
+                           headers={'X-Request-ID': 'abc123'})
+
+    assert response.status_code == 200
+    assert response.headers['X-Request-ID'] == 'abc123'
+    metrics = [metric.split(';')[0] for metric in response.headers['Server-Timing'].split(', ')]
+    for stage in ('parse', 'validate', 'compute', 'persist', 'db.insert', 'build', 'serialize', 'total'):
+        assert stage in metrics
+
+
+def test_slow_requests_are_captured(monkeypatch):
+    client = make_client(monkeypatch)
+    client.post('/api/v1/fibonacci', json={'n': 10})
+
+    captured = client.get('/api/v1/debug/slow-requests').get_json()['requests']
+
+    assert captured[0]['spans']['name'] == 'POST /api/v1/fibonacci'
+    child_names = [child['name'] for child in captured[0]['spans']['children']]
+    assert child_names == ['parse', 'validate', 'compute', 'persist', 'build', 'serialize']
+    persist = captured[0]['spans']['children'][3]
+    assert [child['name'] for child in persist['children']] == ['db.connect', 'db.insert', 'db.commit']
+
+
+def test_serialize_span_times_the_response_encoder(monkeypatch):
+    client = make_client(monkeypatch)
+    client.post('/api/v1/factorial', json={'n': 500}, headers={'Accept': 'application/json'})
+
+    captured = client.get('/api/v1/debug/slow-requests').get_json()['requests']
+
+    # The encoder runs after the view returns, so its span is the last child of the request
+    assert captured[0]['spans']['children'][-1]['name'] == 'serialize'
+
+
+def test_fast_requests_are_not_captured(monkeypatch):
+    client = make_client(monkeypatch, slow_ms='60000')
+    client.post('/api/v1/factorial', json={'n': 5})
+
+    assert client.get('/api/v1/debug/slow-requests').get_json()['requests'] == []
+
+
+def test_tracing_off_adds_no_headers(monkeypatch):
+    client = make_client(monkeypatch, sample_rate='0')
+
+    response = client.post('/api/v1/factorial', json={'n': 5})
+
+    assert 'Server-Timing' not in response.headers
+    assert client.get('/api/v1/debug/slow-requests').get_json()['requests'] == []
+
+
+def test_span_outside_a_request_is_a_no_op():
+    with span('compute') as active:
+        pass
+
+    assert not isinstance(active, Trace)
+
+
+def test_repeated_spans_are_summed_in_server_timing():
+    trace = Trace('id', 'root')
+    for _ in range(2):
+        trace.end_span(trace.start_span('db.insert'))
+    trace.finish()
+
+    assert trace.server_timing().count('db.insert') == 1
@@ -0,0 +1,67 @@
+"""
+Tests for the operation endpoints generated from the registry
+Run with: python -m pytest test_views.py
+"""
+
+import math
+
+import pytest
+
+from app import create_app
+from app.operations import registry
+
+
+@pytest.fixture
+def client():
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize('name, body, expected', [
+    ('power', {'base': 2, 'exponent': 3}, 8.0),
+    ('fibonacci', {'n': 10}, 55),
+    ('factorial', {'n': 100}, math.factorial(100)),
+])
+def test_operations_compute_and_report(client, name, body, expected):
+    response = client.post(f'/api/v1/{name}', json=body)
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['operation'] == name
+    assert data['input_data'] == body
+    assert data['result'] == expected
+    assert data['execution_time_ms'] >= 0
+    assert 'timestamp' in data
+
+
+@pytest.mark.parametrize('name, body, status_code, message', [
+    ('power', {}, 400, 'No JSON data provided'),
+    ('power', {'base': 2}, 400, 'Invalid input'),
+    ('fibonacci', {'n': -1}, 400, 'Invalid input'),
+    ('factorial', {'n': 'x'}, 400, 'Invalid input'),
+])
+def test_operations_report_errors(client, name, body, status_code, message):
+    response = client.post(f'/api/v1/{name}', json=body)
+
+    assert response.status_code == status_code
+    data = response.get_json()
+    assert data['operation'] == name
+    assert message in data['error']
+
+
+def test_every_registered_operation_gets_a_route_and_swagger_model(client):
+    spec = client.get('/swagger.json').get_json()
+
+    for operation in registry:
+        assert f'/api/v1/{operation.name}' in spec['paths']
+        input_model = spec['definitions'][f'{operation.name.capitalize()}Input']
+        assert set(input_model['properties']) == set(operation.request_model.model_fields)
+
+    assert spec['definitions']['FibonacciInput']['properties']['n']['type'] == 'integer'
+    assert spec['definitions']['PowerInput']['properties']['base']['type'] == 'number'
+
+
+def test_health_lists_registered_operations(client):
+    endpoints = client.get('/api/v1/health').get_json()['available_endpoints']
+
+    for name in registry.names():
+        assert f'POST /api/v1/{name}' in endpoints
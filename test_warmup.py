@@ -0,0 +1,99 @@
+"""
+Tests for history-driven cache warm-up
+Run with: python -m pytest test_warmup.py
+"""
+
+import pytest
+
+from app import create_app
+from app.cache import SharedResultCache
+from app.controllers import CachedMathController
+from app.database import DatabaseManager, ShardedDatabaseManager
+from app.models import FactorialRequest, FibonacciRequest
+from app.operations import Operation, OperationRegistry
+from app.warmup import CacheWarmer
+
+
+@pytest.fixture
+def cache(tmp_path):
+    shared_cache = SharedResultCache(str(tmp_path / 'cache.bin'), sets=64, ways=4)
+    yield shared_cache
+    shared_cache.close()
+
+
+def make_registry(controller):
+    registry = OperationRegistry()
+    registry.register(Operation('fibonacci', FibonacciRequest, controller.calculate_fibonacci,
+                                'fib', 'fib', {'n': 1}, cost=lambda n: float(n)))
+    registry.register(Operation('factorial', FactorialRequest, controller.calculate_factorial,
+                                'fact', 'fact', {'n': 1}, cost=lambda n: float(n)))
+    return registry
+
+
+def record(db, operation, n, times):
+    for _ in range(times):
+        db.save_calculation(operation, {'n': n}, 0, 0.1)
+
+
+def test_frequent_inputs_are_ranked_by_request_count(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'calc.db'))
+    record(db, 'fibonacci', 10, 3)
+    record(db, 'fibonacci', 20, 5)
+    record(db, 'fibonacci', 30, 1)
+    record(db, 'factorial', 10, 9)
+
+    assert db.get_frequent_inputs('fibonacci', limit=2) == [({'n': 20}, 5), ({'n': 10}, 3)]
+    assert db.get_frequent_inputs('fibonacci', since='2999-01-01 00:00:00') == []
+
+
+def test_sharded_frequent_inputs_sum_across_shards(tmp_path):
+    db = ShardedDatabaseManager(str(tmp_path), by_operation=True)
+    record(db, 'fibonacci', 10, 2)
+    record(db, 'fibonacci', 20, 3)
+    record(db, 'factorial', 10, 4)
+
+    assert db.get_frequent_inputs('fibonacci', limit=1) == [({'n': 20}, 3)]
+
+
+def test_warmup_precomputes_top_inputs(tmp_path, cache):
+    db = DatabaseManager(str(tmp_path / 'calc.db'))
+    record(db, 'fibonacci', 10, 3)
+    record(db, 'fibonacci', 20, 2)
+    record(db, 'fibonacci', 30, 1)
+    record(db, 'factorial', 5, 4)
+    record(db, 'factorial', -1, 2)  # no longer valid input: skipped, not fatal
+
+    warmer = CacheWarmer(make_registry(CachedMathController(cache)), db, top_k=2)
+    warmer.ensure_started()
+    assert warmer.wait(timeout=30)
+
+    assert cache.get('fibonacci:10') == 55
+    assert cache.get('fibonacci:20') == 6765
+    assert cache.get('fibonacci:30') is None
+    assert cache.get('factorial:5') == 120
+
+    status = warmer.status()
+    assert status['state'] == 'done'
+    assert status['operations']['fibonacci'] == {'planned': 2, 'warmed': 2, 'failed': 0, 'coverage': 1.0}
+    assert status['operations']['factorial']['failed'] == 1
+    assert status['operations']['factorial']['coverage'] == pytest.approx(4 / 6, abs=1e-4)
+
+
+def test_warmup_runs_once_per_process(tmp_path, cache):
+    db = DatabaseManager(str(tmp_path / 'calc.db'))
+    warmer = CacheWarmer(make_registry(CachedMathController(cache)), db)
+    warmer.ensure_started()
+    first_thread = warmer._thread
+    warmer.ensure_started()
+
+    assert warmer._thread is first_thread
+    assert warmer.wait(timeout=30)
+
+
+def test_health_reports_warmup():
+    client = create_app().test_client()
+
+    warmup = client.get('/api/v1/health').get_json()['warmup']
+
+    # The test app runs without the shared cache, so there is nothing to warm
+    assert warmup == {'state': 'disabled'}